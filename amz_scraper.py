@@ -1,34 +1,61 @@
 from __future__ import annotations
 
 import re
+import threading
 from typing import List, Optional, Dict, Any, Iterable, Tuple
 from urllib.parse import urlparse, parse_qs, unquote, urljoin
 
 from bs4 import BeautifulSoup, Tag
-import default_selectors as DEFAULT_SELECTORS
+from default_selectors import DEFAULT_SELECTORS
 
 from data_models import ProductDetails, SearchCard
+from price_patterns import AMOUNT_RE, LTD_HINT, PCT_RE
+from selector_chain import Selector, SelectorChain, fixed_priority_fields, iter_selector_fields, selector_union
 
 MONEY_RE = re.compile(r"(\d{1,3}(?:[,]\d{3})*(?:\.\d{2})|\d+(?:\.\d{2})?)")
-PCT_RE = re.compile(r"(\d{1,3})\s*%")
-LTD_HINT = re.compile(r"(limited[-\s]?time|deal|lightning)", re.I)
+ASIN_RE = re.compile(r"/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})(?:[/?]|$)")
+RATING_RE = re.compile(r"(\d+(?:\.\d+)?)")
+COUNT_RE = re.compile(r"(\d[\d,]*(?:\.\d+)?)\s*([KkMm])?")
 
 BASE = "https://www.amazon.com"
 
+NEXT_PAGE_DISABLED = "span.s-pagination-item.s-pagination-next.s-pagination-disabled"
+NEXT_PAGE_LINK = "a.s-pagination-item.s-pagination-next"
+ASIN_CONTAINER = "[data-asin]"
+
+# Optional page_result_products selector -> raw text field (packs exported before they existed may lack them)
+CARD_TEXT_FIELDS = {
+    "price_current": "price_current_text",
+    "price_original": "price_original_text",
+    "coupon_text": "coupon_text",
+    "rating": "rating_text",
+    "review_count": "review_count_text",
+}
+
 
 class AmzScraper:
     """
     Parser + flow. Expects a fetcher with a .fetch(url, rotate_on_fail=True, referer=None) -> str.
     For 'visible Tor' runs, pass BrowserFetcher from selenium_fetcher.py.
+    With extract_in_browser=True the fetcher must also provide .extract(url, spec, ...) -> dict
+    (BrowserFetcher/BrowserPool): selectors run in the page and only the field values come back.
     """
 
     def __init__(
         self,
         fetcher,
-        selectors: DEFAULT_SELECTORS = DEFAULT_SELECTORS,
+        selectors: Dict[str, Any] = DEFAULT_SELECTORS,
+        extract_in_browser: bool = False,
     ):
         self.sel = selectors
         self.fetcher = fetcher
+        self._chains: Dict[Any, SelectorChain] = {}
+        self._chains_lock = threading.Lock()  # crawl parses product pages from several pool workers
+        fixed = fixed_priority_fields(selectors)
+        self._fixed_keys = {self._chain_key(sel) for name, sel in iter_selector_fields(selectors) if name in fixed}
+        if extract_in_browser and not hasattr(fetcher, "extract"):
+            raise ValueError("extract_in_browser=True needs a fetcher with .extract() (BrowserFetcher)")
+        self.extract_in_browser = extract_in_browser
 
     # Network
     def fetch(self, url: str, rotate_ip: bool = True, referer: Optional[str] = None) -> str:
@@ -43,15 +70,46 @@ class AmzScraper:
     def _clean_text(s: Optional[str]) -> Optional[str]:
         return re.sub(r"\s+", " ", s).strip() if s else None
 
-    def query_exists(self, root: BeautifulSoup | Tag, selector: str) -> bool:
-        return bool(root.select_one(selector))
-
-    def query_text(self, root: BeautifulSoup | Tag, selector: str) -> Optional[str]:
-        node = root.select_one(selector)
+    # Selector fallback chains: a list or comma union is tried alternative by alternative
+    @staticmethod
+    def _chain_key(selector: Selector) -> Any:
+        return selector if isinstance(selector, str) else tuple(selector)
+
+    def _chain(self, selector: Selector) -> SelectorChain:
+        key = self._chain_key(selector)
+        chain = self._chains.get(key)
+        if chain is None:
+            with self._chains_lock:
+                chain = self._chains.get(key)
+                if chain is None:
+                    chain = self._chains[key] = SelectorChain(selector, adaptive=key not in self._fixed_keys)
+        return chain
+
+    def _ordered(self, selector: Selector) -> List[str]:
+        return self._chain(selector).ordered()
+
+    def selector_stats(self) -> List[Dict[str, Any]]:
+        """Per-alternative tries/hits for every selector queried so far, labelled with its pack field."""
+        names: Dict[Any, str] = {}
+        for name, sel in iter_selector_fields(self.sel):
+            names.setdefault(self._chain_key(sel), name)
+        rows: List[Dict[str, Any]] = []
+        for key, chain in list(self._chains.items()):
+            field = names.get(key, key if isinstance(key, str) else ", ".join(key))
+            rows.extend({"field": field, **r} for r in chain.stats())
+        return rows
+
+    def query_exists(self, root: BeautifulSoup | Tag, selector: Selector) -> bool:
+        return bool(self._chain(selector).select_one(root))
+
+    def _node_text(self, node: Optional[Tag]) -> Optional[str]:
         return self._clean_text(node.get_text(separator=" ", strip=True)) if node else None
 
-    def query_attr(self, root: BeautifulSoup | Tag, selector: str, attr: str) -> Optional[str]:
-        node = root.select_one(selector)
+    def query_text(self, root: BeautifulSoup | Tag, selector: Selector) -> Optional[str]:
+        return self._node_text(self._chain(selector).select_one(root))
+
+    def query_attr(self, root: BeautifulSoup | Tag, selector: Selector, attr: str) -> Optional[str]:
+        node = self._chain(selector).select_one(root)
         return node.get(attr) if node and node.has_attr(attr) else None
 
     # URL normalization and ad-unwrapping
@@ -82,7 +140,9 @@ class AmzScraper:
         return self.query_text(root, self.sel["product_page"]["return_policy"])
 
     def is_in_stock(self, root: BeautifulSoup | Tag) -> Optional[bool]:
-        avail = self.query_text(root, self.sel["product_page"]["is_on_stock"])
+        return self._stock_from_text(self.query_text(root, self.sel["product_page"]["is_on_stock"]))
+
+    def _stock_from_text(self, avail: Optional[str]) -> Optional[bool]:
         if avail is None:
             return None
         pattern = self.sel["product_page"].get("stock_positive_keywords", "in stock")
@@ -100,7 +160,7 @@ class AmzScraper:
         th_sel = self.sel["product_page"]["details_th"]
         td_sel = self.sel["product_page"]["details_td"]
         kv: Dict[str, str] = {}
-        for row in root.select(rows_sel):
+        for row in root.select(selector_union(rows_sel)):
             k = self.query_text(row, th_sel)
             v = self.query_text(row, td_sel)
             if k and v:
@@ -115,7 +175,7 @@ class AmzScraper:
         if not (rows and key_sel and val_sel):
             return {}
         kv: Dict[str, str] = {}
-        for li in root.select(rows):
+        for li in root.select(selector_union(rows)):
             k = self.query_text(li, key_sel)
             v = self.query_text(li, val_sel)
             if k:
@@ -144,7 +204,7 @@ class AmzScraper:
     def _money_to_float(text: Optional[str]) -> Optional[float]:
         if not text:
             return None
-        m = re.search(r"(\d+(?:\.\d{2})?)", text.replace(",", ""))
+        m = AMOUNT_RE.search(text.replace(",", ""))
         return float(m.group(1)) if m else None
 
     def _extract_price_fields(self, root: BeautifulSoup | Tag) -> Dict[str, Optional[str]]:
@@ -164,10 +224,10 @@ class AmzScraper:
         ltd_text: Optional[str],
     ) -> Tuple[Optional[float], Optional[str]]:
         if coupon_text:
-            m = re.search(r"(\d{1,3})\s*%", coupon_text)
+            m = PCT_RE.search(coupon_text)
             if m:
                 return float(m.group(1)), "coupon"
-            amt = re.search(r"(\d+(?:\.\d{2})?)", (coupon_text or "").replace(",", ""))
+            amt = AMOUNT_RE.search(coupon_text.replace(",", ""))
             if amt and price_current and price_current > 0:
                 val = float(amt.group(1))
                 return round(100.0 * val / price_current, 2), "coupon"
@@ -180,41 +240,142 @@ class AmzScraper:
                 return pct, "price_compare"
 
         if ltd_text:
-            m = re.search(r"(\d{1,3})\s*%", ltd_text)
+            m = PCT_RE.search(ltd_text)
             if m:
                 return float(m.group(1)), "limited_deal"
 
         return None, None
 
-    def parse_product_page(self, html: str) -> ProductDetails:
-        root = self.soup(html)
-        price_fields = self._extract_price_fields(root)
-        price_current = self._money_to_float(price_fields["price_current_text"])
-        price_original = self._money_to_float(price_fields["price_original_text"])
+    def _build_product_details(self, f: Dict[str, Any], details_kv: Dict[str, str]) -> ProductDetails:
+        price_current = self._money_to_float(f["price_current_text"])
+        price_original = self._money_to_float(f["price_original_text"])
         discount_percent, discount_source = self._compute_discount(
-            price_current, price_original, price_fields["coupon_text"], price_fields["limited_deal_text"]
+            price_current, price_original, f["coupon_text"], f["limited_deal_text"]
         )
-        details_kv = self.get_details_kv(root)
         return ProductDetails(
-            name=self.get_product_name(root),
-            seller_name=self.get_seller_name(root),
-            description_text=self.get_description(root),
-            is_in_stock=self.is_in_stock(root),
-            return_policy_text=self.get_return_policy(root),
-            images_text=self.get_images_text(root),
+            name=f["name"],
+            seller_name=f["seller_name"],
+            description_text=f["description_text"],
+            is_in_stock=self._stock_from_text(f["availability_text"]),
+            return_policy_text=f["return_policy_text"],
+            images_text=f["images_text"],
             details_kv=details_kv,
-            has_related_deals=self.has_related_deals(root),
+            has_related_deals=f["has_related_deals"],
             price_current=price_current,
             price_original=price_original,
-            coupon_text=price_fields["coupon_text"],
-            limited_deal_text=price_fields["limited_deal_text"],
+            coupon_text=f["coupon_text"],
+            limited_deal_text=f["limited_deal_text"],
             discount_percent=discount_percent,
             discount_source=discount_source,
+            price_current_text=f["price_current_text"],
+            price_original_text=f["price_original_text"],
         )
 
+    def parse_product_page(self, html: str) -> ProductDetails:
+        root = self.soup(html)
+        fields: Dict[str, Any] = {
+            "name": self.get_product_name(root),
+            "seller_name": self.get_seller_name(root),
+            "description_text": self.get_description(root),
+            "availability_text": self.query_text(root, self.sel["product_page"]["is_on_stock"]),
+            "return_policy_text": self.get_return_policy(root),
+            "images_text": self.get_images_text(root),
+            "has_related_deals": self.has_related_deals(root),
+        }
+        fields.update(self._extract_price_fields(root))
+        return self._build_product_details(fields, self.get_details_kv(root))
+
+    # In-browser extraction.
+    # A spec maps field -> op: {"text": sels} | {"exists": sels} | {"attr": sels, "name": attr}
+    # | {"rows": sel, "fields": spec} | {"closest": sel, "name": attr} (nearest ancestor-or-self);
+    # BrowserFetcher.extract evaluates it with one execute_script.
+    # sels is a fallback list in the chain's current order; rows need every match, so they get the union.
+    def product_extraction_spec(self) -> Dict[str, Any]:
+        s = self.sel["product_page"]
+        spec: Dict[str, Any] = {
+            "name": {"text": self._ordered(s["title"])},
+            "seller_name": {"text": self._ordered(s["seller_name"])},
+            "description_text": {"text": self._ordered(s["description"])},
+            "availability_text": {"text": self._ordered(s["is_on_stock"])},
+            "return_policy_text": {"text": self._ordered(s["return_policy"])},
+            "images_text": {"text": self._ordered(s["images"])},
+            "has_related_deals": {"exists": self._ordered(s["is_more_deals_on_releated_products"])},
+            "price_current_text": {"text": self._ordered(s["price_current"])},
+            "price_original_text": {"text": self._ordered(s["price_original"])},
+            "coupon_text": {"text": self._ordered(s["coupon_text"])},
+            "limited_deal_text": {"text": self._ordered(s["limited_deal_badge"])},
+            "details_rows": {
+                "rows": selector_union(s["details_table_rows"]),
+                "fields": {
+                    "k": {"text": self._ordered(s["details_th"])},
+                    "v": {"text": self._ordered(s["details_td"])},
+                },
+            },
+        }
+        if s.get("detail_bullets_rows") and s.get("detail_bullets_key") and s.get("detail_bullets_val"):
+            spec["bullet_rows"] = {
+                "rows": selector_union(s["detail_bullets_rows"]),
+                "fields": {
+                    "k": {"text": self._ordered(s["detail_bullets_key"])},
+                    "v": {"text": self._ordered(s["detail_bullets_val"])},
+                },
+            }
+        return spec
+
+    def search_extraction_spec(self) -> Dict[str, Any]:
+        s = self.sel["page_result_products"]
+        return {
+            "cards": {
+                "rows": selector_union(s["product_container"]),
+                "fields": {
+                    "title": {"text": self._ordered(s["title"])},
+                    "price_text": {"text": self._ordered(s["price"])},
+                    "has_coupon": {"exists": self._ordered(s["is_coupon_exist"])},
+                    "is_limited_time_deal": {"exists": self._ordered(s["is_limited_time_deal"])},
+                    "limited_deal_text": {"text": self._ordered(s["is_limited_time_deal"])},
+                    "href": {"attr": self._ordered(s["product_link_to_extra_data"]), "name": "href"},
+                    "asin": {"closest": ASIN_CONTAINER, "name": "data-asin"},
+                    **({"is_prime": {"exists": self._ordered(s["is_prime"])}} if s.get("is_prime") else {}),
+                    **{field: {"text": self._ordered(s[k])} for k, field in CARD_TEXT_FIELDS.items() if s.get(k)},
+                },
+            },
+            "next_disabled": {"exists": self._ordered(NEXT_PAGE_DISABLED)},
+            "next_href": {"attr": self._ordered(NEXT_PAGE_LINK), "name": "href"},
+        }
+
+    def product_from_fields(self, fields: Dict[str, Any]) -> ProductDetails:
+        f = {k: self._clean_text(v) if isinstance(v, str) else v for k, v in fields.items()}
+        kv: Dict[str, str] = {}
+        for rows in (f.get("details_rows") or [], f.get("bullet_rows") or []):
+            for row in rows:
+                k, v = self._clean_text(row.get("k")), self._clean_text(row.get("v"))
+                if k:
+                    k = k.rstrip(":").strip()
+                if k and v:
+                    kv[k] = v
+        return self._build_product_details(f, kv)
+
+    def search_from_fields(self, fields: Dict[str, Any]) -> Tuple[List[SearchCard], Optional[str]]:
+        cards = []
+        for c in fields.get("cards") or []:
+            f = {k: self._clean_text(v) if isinstance(v, str) else v for k, v in c.items()}
+            f["href"] = c.get("href")
+            f.setdefault("is_prime", False)
+            for field in CARD_TEXT_FIELDS.values():
+                f.setdefault(field, None)
+            cards.append(self._build_search_card(f))
+        next_url = None if fields.get("next_disabled") else self.normalize_product_url(fields.get("next_href"))
+        return cards, next_url
+
+    def fetch_product(self, url: str, rotate_ip: bool = True, referer: Optional[str] = None) -> ProductDetails:
+        if self.extract_in_browser:
+            fields = self.fetcher.extract(url, self.product_extraction_spec(), rotate_on_fail=rotate_ip, referer=referer)
+            return self.product_from_fields(fields)
+        return self.parse_product_page(self.fetch(url, rotate_ip=rotate_ip, referer=referer))
+
     # Search parsing
     def _iter_product_cards(self, root: BeautifulSoup | Tag) -> Iterable[Tag]:
-        return root.select(self.sel["page_result_products"]["product_container"])
+        return root.select(selector_union(self.sel["page_result_products"]["product_container"]))
 
     def get_card_title(self, card: Tag) -> Optional[str]:
         return self.query_text(card, self.sel["page_result_products"]["title"])
@@ -232,26 +393,87 @@ class AmzScraper:
         href = self.query_attr(card, self.sel["page_result_products"]["product_link_to_extra_data"], "href")
         return self.normalize_product_url(href)
 
+    def get_card_asin(self, card: Tag) -> Optional[str]:
+        # nearest ancestor-or-self carrying data-asin, like Element.closest() in the browser spec
+        for node in [card, *card.parents]:
+            if isinstance(node, Tag) and node.has_attr("data-asin"):
+                return node["data-asin"] or None
+        return None
+
+    def _card_fields(self, card: Tag) -> Dict[str, Any]:
+        s = self.sel["page_result_products"]
+        # One lookup for both the flag and the badge text (keeps the chain's stats at one call per card)
+        ltd_node = self._chain(s["is_limited_time_deal"]).select_one(card)
+        f: Dict[str, Any] = {
+            "title": self.get_card_title(card),
+            "price_text": self.get_card_price_text(card),
+            "has_coupon": self.card_has_coupon(card),
+            "is_limited_time_deal": ltd_node is not None,
+            "limited_deal_text": self._node_text(ltd_node),
+            "is_prime": self.query_exists(card, s["is_prime"]) if s.get("is_prime") else False,
+            "href": self.query_attr(card, s["product_link_to_extra_data"], "href"),
+            "asin": self.get_card_asin(card),
+        }
+        for key, field in CARD_TEXT_FIELDS.items():
+            f[field] = self.query_text(card, s[key]) if s.get(key) else None
+        return f
+
+    @staticmethod
+    def _rating_to_float(text: Optional[str]) -> Optional[float]:
+        m = RATING_RE.search(text) if text else None
+        return float(m.group(1)) if m else None
+
+    @staticmethod
+    def _count_to_int(text: Optional[str]) -> Optional[int]:
+        m = COUNT_RE.search(text) if text else None
+        if not m:
+            return None
+        num, suffix = m.group(1).replace(",", ""), (m.group(2) or "").upper()
+        if suffix:
+            return int(round(float(num) * (1_000 if suffix == "K" else 1_000_000)))
+        return int(float(num))
+
+    def _build_search_card(self, f: Dict[str, Any]) -> SearchCard:
+        product_url = self.normalize_product_url(f["href"])
+        asin = f.get("asin")
+        if not asin and product_url:
+            m = ASIN_RE.search(urlparse(product_url).path)
+            asin = m.group(1) if m else None
+        price_current = self._money_to_float(f["price_current_text"])
+        price_original = self._money_to_float(f["price_original_text"])
+        coupon_text = f["coupon_text"]
+        discount_percent, discount_source = self._compute_discount(
+            price_current, price_original, coupon_text, f["limited_deal_text"]
+        )
+        return SearchCard(
+            title=f["title"],
+            price_text=f["price_text"] or f["price_current_text"],
+            has_coupon=bool(f["has_coupon"]),
+            is_limited_time_deal=bool(f["is_limited_time_deal"]),
+            product_url=product_url,
+            asin=asin,
+            price_current=price_current,
+            price_original=price_original,
+            coupon_text=coupon_text,
+            rating=self._rating_to_float(f["rating_text"]),
+            review_count=self._count_to_int(f["review_count_text"]),
+            is_prime=bool(f["is_prime"]),
+            discount_percent=discount_percent,
+            discount_source=discount_source,
+            price_current_text=f["price_current_text"],
+            price_original_text=f["price_original_text"],
+            limited_deal_text=f["limited_deal_text"],
+        )
+
     def parse_search_results(self, html: str) -> List[SearchCard]:
         root = self.soup(html)
-        out: List[SearchCard] = []
-        for card in self._iter_product_cards(root):
-            out.append(
-                SearchCard(
-                    title=self.get_card_title(card),
-                    price_text=self.get_card_price_text(card),
-                    has_coupon=self.card_has_coupon(card),
-                    is_limited_time_deal=self.card_is_limited_time_deal(card),
-                    product_url=self.get_card_product_url(card),
-                )
-            )
-        return out
+        return [self._build_search_card(self._card_fields(card)) for card in self._iter_product_cards(root)]
 
     # Pagination
     def _next_page_url_from_root(self, root: BeautifulSoup | Tag) -> Optional[str]:
-        if root.select_one("span.s-pagination-item.s-pagination-next.s-pagination-disabled"):
+        if self.query_exists(root, NEXT_PAGE_DISABLED):
             return None
-        a = root.select_one("a.s-pagination-item.s-pagination-next")
+        a = self._chain(NEXT_PAGE_LINK).select_one(root)
         if not a:
             return None
         href = a.get("href")
@@ -274,10 +496,17 @@ class AmzScraper:
             seen_urls.add(url)
             pages += 1
 
-            html = self.fetch(url, rotate_ip=rotate_ip, referer=prev_url or BASE + "/")
-            all_cards.extend(self.parse_search_results(html))
-
-            next_url = self.next_page_url(html)
+            referer = prev_url or BASE + "/"
+            if self.extract_in_browser:
+                fields = self.fetcher.extract(
+                    url, self.search_extraction_spec(), rotate_on_fail=rotate_ip, referer=referer
+                )
+                cards, next_url = self.search_from_fields(fields)
+                all_cards.extend(cards)
+            else:
+                html = self.fetch(url, rotate_ip=rotate_ip, referer=referer)
+                all_cards.extend(self.parse_search_results(html))
+                next_url = self.next_page_url(html)
             prev_url, url = url, next_url
 
         return all_cards
@@ -19,4 +19,8 @@ def export_rows_csv(path: str, rows: List[Dict[str, Any]], append: bool = False)
         if mode == "w":
             w.writeheader()
         for r in rows:
-            w.writerow({k: r.get(k) for k in fieldnames})
\ No newline at end of file
+            w.writerow({k: r.get(k) for k in fieldnames})
+
+def read_rows_csv(path: str) -> List[Dict[str, Any]]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return list(csv.DictReader(f))
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import  Optional, Dict
+from typing import  Optional, Dict, Tuple
 
 @dataclass
 class SearchCard:
@@ -8,6 +8,18 @@ class SearchCard:
     has_coupon: bool
     is_limited_time_deal: bool
     product_url: Optional[str]
+    asin: Optional[str] = None
+    price_current: Optional[float] = None
+    price_original: Optional[float] = None
+    coupon_text: Optional[str] = None
+    rating: Optional[float] = None
+    review_count: Optional[int] = None
+    is_prime: bool = False
+    discount_percent: Optional[float] = None
+    discount_source: Optional[str] = None  # same values as ProductDetails.discount_source
+    price_current_text: Optional[str] = None  # raw card texts, kept so rows can be re-priced
+    price_original_text: Optional[str] = None
+    limited_deal_text: Optional[str] = None
 
 
 @dataclass
@@ -26,3 +38,23 @@ class ProductDetails:
     limited_deal_text: Optional[str] = None
     discount_percent: Optional[float] = None
     discount_source: Optional[str] = None  # "coupon" | "limited_deal" | "price_compare"
+    price_current_text: Optional[str] = None  # raw texts, kept so archives can be re-priced
+    price_original_text: Optional[str] = None
+
+
+@dataclass
+class EnrichmentPolicy:
+    """
+    Whether a search card needs its product page. mode: "always" | "missing" | "never".
+    With "missing", the page is fetched only if a required field is None on the card;
+    product-page-only fields (e.g. "product_dimensions") therefore always trigger a fetch.
+    """
+    required: Tuple[str, ...] = ("price_current",)
+    mode: str = "missing"
+
+    def needs_product_page(self, card: SearchCard) -> bool:
+        if not card.product_url or self.mode == "never":
+            return False
+        if self.mode == "always":
+            return True
+        return any(getattr(card, f, None) is None for f in self.required)
@@ -1,6 +1,22 @@
 from typing import Dict, Any
 
 DEFAULT_SELECTORS: Dict[str, Any] = {
+    # Fallback lists that keep their written order: their alternatives can match the same node
+    # (or nest), so adaptive reordering would change the value returned, not just the lookup cost
+    "fixed_priority": [
+        "page_result_products.price_current",
+        "page_result_products.price_original",
+        "page_result_products.coupon_text",
+        "page_result_products.rating",
+        "page_result_products.review_count",
+        "product_page.title",
+        "product_page.details_th",
+        "product_page.details_td",
+        "product_page.price_current",
+        "product_page.price_original",
+        "product_page.coupon_text",
+        "product_page.limited_deal_badge",
+    ],
     "navbar": {
         "search_result_input": "#twotabsearchtextbox",
         "search_button": "#nav-search-submit-button",
@@ -18,9 +34,36 @@ DEFAULT_SELECTORS: Dict[str, Any] = {
         "product_link_to_extra_data": "a.a-link-normal.s-no-outline",
         "title": "h2.a-size-base-plus.a-spacing-none.a-color-base.a-text-normal",
         "is_limited_time_deal": 'span[data-a-badge-color="sx-red-mvt"]',
+
+        # Extra grid fields, so most cards need no product-page fetch
+        "price_current": [
+            ".a-price[data-a-color='base'] .a-offscreen",
+            ".a-price:not(.a-text-price) .a-offscreen",
+        ],
+        # Strike-through only: the unit price ("$0.50/count") is also an .a-price.a-text-price
+        "price_original": [
+            ".a-price.a-text-price[data-a-strike='true'] .a-offscreen",
+            "[data-a-strike='true'] .a-offscreen",
+        ],
+        "coupon_text": [
+            ".s-coupon-unclipped",
+            ".s-coupon-highlight-color",
+        ],
+        "rating": [
+            "i.a-icon-star-small span.a-icon-alt",
+            "i[class*='a-star'] span.a-icon-alt",
+        ],
+        "review_count": [
+            "[data-csa-c-content-id*='customer-reviews'] span.s-underline-text",
+            "a[href*='#customerReviews'] span.a-size-base",
+        ],
+        "is_prime": [
+            "i.a-icon-prime",
+            "[aria-label='Amazon Prime']",
+        ],
     },
     "product_page": {
-        "title": "#productTitle, h1#title",
+        "title": ["#productTitle", "h1#title"],
         "images": "#canvasCaption",
         "seller_name": "#sellerProfileTriggerId",
         "description": "#feature-bullets",
@@ -45,10 +88,27 @@ DEFAULT_SELECTORS: Dict[str, Any] = {
         "is_more_deals_on_releated_products": "#sp_detail_thematic-hercules_hybrid_deals_T1",
         "stock_positive_keywords": "in stock|available|ships soon",
 
-        # Pricing selectors
-        "price_current": "#corePrice_feature_div .a-price .a-offscreen, #price_inside_buybox, #tp_price_block_total_price_ww",
-        "price_original": "#price .a-text-price .a-offscreen, #corePrice_desktop .a-text-price .a-offscreen, #listPriceLegalMessage .a-offscreen",
-        "coupon_text": "#couponBadgeRegularArithmetic, #couponTextBucket, #promoPriceBlockMessage_feature_div",
-        "limited_deal_badge": "span[data-a-badge-color='sx-red-mvt'], #dealBadge_feature_div, #priceBadging_feature_div",
+        # Pricing selectors: ordered fallback lists, first alternative that matches wins
+        # (comma unions still work and are split into alternatives the same way)
+        "price_current": [
+            "#corePrice_feature_div .a-price .a-offscreen",
+            "#price_inside_buybox",
+            "#tp_price_block_total_price_ww",
+        ],
+        "price_original": [
+            "#price .a-text-price .a-offscreen",
+            "#corePrice_desktop .a-text-price .a-offscreen",
+            "#listPriceLegalMessage .a-offscreen",
+        ],
+        "coupon_text": [
+            "#couponBadgeRegularArithmetic",
+            "#couponTextBucket",
+            "#promoPriceBlockMessage_feature_div",
+        ],
+        "limited_deal_badge": [
+            "span[data-a-badge-color='sx-red-mvt']",
+            "#dealBadge_feature_div",
+            "#priceBadging_feature_div",
+        ],
     },
 }
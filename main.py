@@ -1,95 +1,385 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
+import json
 import os
-import time
 import random
-from typing import List, Dict, Any
+import sys
+import time
+from typing import List, Dict, Any, Optional, Tuple
 
-from selenium_fetcher import BrowserFetcher
-from amz_scraper import AmzScraper
-from data_models import SearchCard
-from csv_fns import export_rows_csv
+# Keep top-level imports stdlib-only: bs4, Selenium, requests_tor and fake_headers
+# are imported inside the subcommand / backend that needs them (cron cold-start).
+from csv_fns import export_rows_csv, read_rows_csv
+from price_patterns import LOCALES, locale_for_url
 
 BASE = "https://www.amazon.com"
+DEFAULT_SEED_URL = "https://www.amazon.com/s?k=hats&ref=nb_sb_noss_2"
+
+PRODUCT_COLUMNS = (
+    "title",
+    "price_current",
+    "price_original",
+    "discount_percent",
+    "discount_source",
+    "has_coupon",
+    "is_limited_time_deal",
+    "url",
+    "product_dimensions",
+    "asin",
+    "coupon_text",
+    "rating",
+    "review_count",
+    "is_prime",
+    "enriched",
+    "price_current_text",
+    "price_original_text",
+    "limited_deal_text",
+)
+
+# Raw text columns `reprice` reads; rows without price texts keep their numbers
+REPRICE_TEXT_COLUMNS = ("price_current_text", "price_original_text", "coupon_text", "limited_deal_text")
+
+
+def load_selectors(path: Optional[str]) -> Dict[str, Any]:
+    """Load the selector pack once: a JSON file if given, else the bundled defaults."""
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    from default_selectors import DEFAULT_SELECTORS
+    return DEFAULT_SELECTORS
 
-TOR_BROWSER_PATH = None  # e.g. "/Applications/Tor Browser.app/Contents/MacOS/firefox"
-GECKODRIVER_PATH = None  # e.g. "/opt/homebrew/bin/geckodriver" or "/usr/local/bin/geckodriver"
 
+class ArchivingFetcher:
+    """
+    Wraps a fetcher and saves every page under <directory>/<kind>/ for later `parse` runs,
+    as <sha1>.html plus a <sha1>.url sidecar holding the page URL.
+    """
+
+    def __init__(self, fetcher, directory: str):
+        self.fetcher = fetcher
+        self.directory = directory
+        self.kind = "search"
+
+    def fetch(self, url: str, rotate_on_fail: bool = True, referer: Optional[str] = None) -> str:
+        html = self.fetcher.fetch(url, rotate_on_fail=rotate_on_fail, referer=referer)
+        d = os.path.join(self.directory, self.kind)
+        os.makedirs(d, exist_ok=True)
+        base = os.path.join(d, hashlib.sha1(url.encode("utf-8")).hexdigest())
+        with open(base + ".html", "w", encoding="utf-8") as f:
+            f.write(html)
+        with open(base + ".url", "w", encoding="utf-8") as f:
+            f.write(url + "\n")
+        return html
+
+    def close(self):
+        self.fetcher.close()
+
+
+def archived_url(html_path: str) -> Optional[str]:
+    """URL from the .url sidecar ArchivingFetcher writes next to a page; None for other HTML files."""
+    try:
+        with open(os.path.splitext(html_path)[0] + ".url", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
 
-def run(seed_url: str, page_limit: int = 10) -> None:
-    fetcher = BrowserFetcher(
-        tor_browser_path=TOR_BROWSER_PATH,
-        geckodriver_path=GECKODRIVER_PATH,
-        headless=False,
-        page_load_timeout=60,
-        per_req_sleep=(1.2, 2.8),
-        warmup=True,
+
+def make_fetcher(args: argparse.Namespace, selectors: Dict[str, Any]):
+    if args.backend == "browser":
+        from selenium_fetcher import ready_selector_for
+        browser_kwargs = dict(
+            tor_browser_path=args.tor_browser_path,
+            geckodriver_path=args.geckodriver_path,
+            headless=args.headless,
+            page_load_timeout=60,
+            per_req_sleep=(1.2, 2.8),
+            warmup=True,
+            block_resources=not args.load_resources,
+            ready_selector=ready_selector_for(selectors),
+            tor_socks=args.tor_socks,
+        )
+        if args.browsers > 1:
+            from selenium_fetcher import BrowserPool
+            return BrowserPool(size=args.browsers, **browser_kwargs)
+        from selenium_fetcher import BrowserFetcher
+        return BrowserFetcher(**browser_kwargs)
+    from robust_fetcher import RobustFetcher
+    return RobustFetcher(
+        use_tor=args.tor,
+        tor_ports=tuple(args.tor_port or (9150,)),
+        tor_cport=args.tor_cport,
+        rotate_every=args.rotate_every,
     )
 
-    scraper = AmzScraper(fetcher=fetcher)
+
+def _product_row(card, details=None) -> Dict[str, Any]:
+    from amz_scraper import AmzScraper
+
+    row: Dict[str, Any] = dict.fromkeys(PRODUCT_COLUMNS)
+    if card is not None:
+        row.update({
+            "title": card.title,
+            "price_current": card.price_current,
+            "price_original": card.price_original,
+            "discount_percent": card.discount_percent,
+            "discount_source": card.discount_source,
+            "has_coupon": card.has_coupon,
+            "is_limited_time_deal": card.is_limited_time_deal,
+            "url": card.product_url,
+            "asin": card.asin,
+            "coupon_text": card.coupon_text,
+            "rating": card.rating,
+            "review_count": card.review_count,
+            "is_prime": card.is_prime,
+            "price_current_text": card.price_current_text,
+            "price_original_text": card.price_original_text,
+            "limited_deal_text": card.limited_deal_text,
+        })
+    row["enriched"] = details is not None
+    if details is not None:
+        # Card title is kept (product title only fills a gap); for prices, coupon and deal text the
+        # product page wins where it has a value and card values fill the gaps
+        row.update({
+            "title": row["title"] or details.name,
+            "product_dimensions": AmzScraper.get_dimensions_from_kv(details.details_kv or {}),
+            "coupon_text": details.coupon_text or row["coupon_text"],
+            "limited_deal_text": details.limited_deal_text or row["limited_deal_text"],
+        })
+        if details.price_current is not None:
+            # Price texts travel with the numbers they were parsed from
+            row.update({
+                "price_current_text": details.price_current_text,
+                "price_original_text": details.price_original_text,
+                "price_current": details.price_current,
+                "price_original": details.price_original,
+            })
+        # Discount from the merged prices and texts, so the row agrees with itself and `reprice` reproduces it
+        row["discount_percent"], row["discount_source"] = AmzScraper._compute_discount(
+            row["price_current"], row["price_original"], row["coupon_text"], row["limited_deal_text"]
+        )
+    return row
+
+
+def _write_selector_stats(args: argparse.Namespace, scraper) -> None:
+    if args.selector_stats:
+        export_rows_csv(args.selector_stats, scraper.selector_stats(), append=False)
+        print(f"Wrote selector stats: {args.selector_stats}")
+
+
+def cmd_crawl(args: argparse.Namespace, selectors: Dict[str, Any]) -> int:
+    from amz_scraper import AmzScraper
+    from data_models import EnrichmentPolicy
+
+    policy = EnrichmentPolicy(required=tuple(args.require), mode=args.enrich)
+    backend = make_fetcher(args, selectors)
+    fetcher = ArchivingFetcher(backend, args.archive_dir) if args.archive_dir else backend
+    scraper = AmzScraper(fetcher=fetcher, selectors=selectors, extract_in_browser=args.extract_in_browser)
 
     try:
-        cards: List[SearchCard] = scraper.crawl_search(seed_url, page_limit=page_limit, rotate_ip=True)
+        cards = scraper.crawl_search(args.seed_url, page_limit=args.page_limit, rotate_ip=True)
         print(f"Collected {len(cards)} cards across pages.")
 
-        rows: List[Dict[str, Any]] = []
-        for idx, c in enumerate(cards, 1):
+        if args.archive_dir:
+            fetcher.kind = "product"
+
+        def product_row(item) -> Dict[str, Any]:
+            idx, c = item
             url = c.product_url
-            row: Dict[str, Any] = {
-                "title": c.title,
-                "price_current": None,
-                "price_original": None,
-                "discount_percent": None,
-                "discount_source": None,
-                "has_coupon": c.has_coupon,
-                "is_limited_time_deal": c.is_limited_time_deal,
-                "url": url,
-                "product_dimensions": None,
-            }
-
-            if not url:
-                rows.append(row)
-                continue
+            if not policy.needs_product_page(c):
+                return _product_row(c)
 
+            details = None
             try:
                 print(f"[{idx}/{len(cards)}] Fetching product: {url}")
-                html = scraper.fetch(url, rotate_ip=True)
-                details = scraper.parse_product_page(html)
-
-                dims = AmzScraper.get_dimensions_from_kv(details.details_kv or {})
-
-                row.update({
-                    "price_current": details.price_current,
-                    "price_original": details.price_original,
-                    "discount_percent": details.discount_percent,
-                    "discount_source": details.discount_source,
-                    "product_dimensions": dims,
-                })
+                details = scraper.fetch_product(url, rotate_ip=True)
             except Exception as e:
                 print(f"Product fetch failed: {e}")
 
-            rows.append(row)
             time.sleep(random.uniform(1.5, 3.5))
+            return _product_row(c, details)
+
+        # One worker per pooled browser; plain fetchers stay sequential
+        workers = getattr(backend, "size", 1)
+        if workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                rows = list(ex.map(product_row, enumerate(cards, 1)))
+        else:
+            rows = [product_row(item) for item in enumerate(cards, 1)]
 
-        out_path = "out/products_with_discounts.csv"
-        ordered = [{
-            "title": r.get("title"),
-            "price_current": r.get("price_current"),
-            "price_original": r.get("price_original"),
-            "discount_percent": r.get("discount_percent"),
-            "discount_source": r.get("discount_source"),
-            "has_coupon": r.get("has_coupon"),
-            "is_limited_time_deal": r.get("is_limited_time_deal"),
-            "url": r.get("url"),
-            "product_dimensions": r.get("product_dimensions"),
-        } for r in rows]
-        export_rows_csv(out_path, ordered, append=False)
-        print(f"Wrote CSV: {out_path}")
+        export_rows_csv(args.out, rows, append=False)
+        enriched = sum(1 for r in rows if r["enriched"])
+        print(f"Wrote CSV: {args.out} ({enriched}/{len(rows)} product pages fetched)")
 
+        if hasattr(backend, "stats"):
+            print("Fetcher stats: " + json.dumps(backend.stats()))
+        _write_selector_stats(args, scraper)
     finally:
         fetcher.close()
+    return 0
+
+
+def cmd_parse(args: argparse.Namespace, selectors: Dict[str, Any]) -> int:
+    from dataclasses import asdict
+    from urllib.parse import urlparse
+    from amz_scraper import ASIN_RE, AmzScraper
+
+    scraper = AmzScraper(fetcher=None, selectors=selectors)
+    rows: List[Dict[str, Any]] = []
+    for path in args.files:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+        if args.kind == "search":
+            rows.extend(asdict(c) for c in scraper.parse_search_results(html))
+        else:
+            row = _product_row(None, scraper.parse_product_page(html))
+            url = archived_url(path)
+            if url:
+                m = ASIN_RE.search(urlparse(url).path)
+                row.update({"url": url, "asin": m.group(1) if m else None})
+            rows.append(row)
+
+    export_rows_csv(args.out, rows, append=False)
+    print(f"Parsed {len(args.files)} file(s), wrote {len(rows)} row(s) to {args.out}")
+    _write_selector_stats(args, scraper)
+    return 0
+
+
+def cmd_reprice(args: argparse.Namespace, selectors: Dict[str, Any]) -> int:
+    import price_engine
+
+    rows: List[Dict[str, Any]] = []
+    for path in args.files:
+        rows.extend(read_rows_csv(path))
+    if not rows:
+        print("No rows to re-price.")
+        return 0
+
+    cols = {c: [r.get(c) or None for r in rows] for c in REPRICE_TEXT_COLUMNS}
+    if args.locale == "auto":
+        # Per row from the marketplace host (product rows have "url", search rows "product_url")
+        locales = [locale_for_url(r.get("url") or r.get("product_url")) for r in rows]
+    else:
+        locales = [args.locale] * len(rows)
+    res = price_engine.normalize_prices_by_locale(
+        cols["price_current_text"], cols["price_original_text"], cols["coupon_text"], cols["limited_deal_text"],
+        locales,
+    )
+    out = {k: price_engine.to_optional(v) for k, v in res.items()}
+    repriced = 0
+    for i, r in enumerate(rows):
+        if cols["price_current_text"][i] or cols["price_original_text"][i]:
+            r.update({k: out[k][i] for k in out})
+            repriced += 1
+
+    export_rows_csv(args.out, rows, append=False)
+    used = ", ".join(f"{loc}: {locales.count(loc)}" for loc in dict.fromkeys(locales))
+    print(f"Re-priced {repriced}/{len(rows)} row(s) ({used}), wrote {args.out}")
+    return 0
+
+
+def cmd_export(args: argparse.Namespace, selectors: Dict[str, Any]) -> int:
+    if args.reorder_from:
+        from selector_chain import reorder_pack
+        selectors = reorder_pack(selectors, read_rows_csv(args.reorder_from))
+    text = json.dumps(selectors, indent=2, ensure_ascii=False)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0
+
+
+def _host_port(value: str) -> Tuple[str, int]:
+    host, sep, port = value.rpartition(":")
+    if not (sep and host and port.isdigit()):
+        raise argparse.ArgumentTypeError(f"expected HOST:PORT, got {value!r}")
+    return host, int(port)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="amz-tor-scraper", description="Amazon search/product scraper over Tor.")
+    p.add_argument("--selectors", metavar="PATH", help="JSON selector pack (default: bundled DEFAULT_SELECTORS)")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    crawl = sub.add_parser("crawl", help="crawl search pages (and product pages) and write a CSV")
+    crawl.add_argument("seed_url", nargs="?", default=DEFAULT_SEED_URL)
+    crawl.add_argument("--page-limit", type=int, default=10)
+    crawl.add_argument("--backend", choices=("browser", "requests"), default="browser")
+    crawl.add_argument("--out", default="out/products_with_discounts.csv")
+    crawl.add_argument("--archive-dir", metavar="DIR", help="save fetched HTML under DIR/search and DIR/product")
+    crawl.add_argument("--enrich", choices=("missing", "always", "never"), default="missing",
+                       help="fetch product pages: only when --require fields are missing on the card (default), "
+                            "always, or never")
+    crawl.add_argument("--require", type=lambda v: [f.strip() for f in v.split(",") if f.strip()],
+                       default=["price_current"], metavar="FIELDS",
+                       help="comma-separated card fields that must be present to skip the product page "
+                            "(default: price_current; product_dimensions forces a fetch)")
+    crawl.add_argument("--selector-stats", metavar="CSV", help="write per-alternative selector hit stats")
+    # browser backend
+    crawl.add_argument("--tor-browser-path", default=os.environ.get("AMZ_TOR_BROWSER_PATH"),
+                       help="e.g. '/Applications/Tor Browser.app/Contents/MacOS/firefox' (env AMZ_TOR_BROWSER_PATH)")
+    crawl.add_argument("--geckodriver-path", default=os.environ.get("AMZ_GECKODRIVER_PATH"),
+                       help="e.g. /usr/local/bin/geckodriver (env AMZ_GECKODRIVER_PATH)")
+    crawl.add_argument("--headless", action="store_true")
+    crawl.add_argument("--browsers", type=int, default=1,
+                       help="size of the browser pool (parallel product fetches); all browsers share one tor")
+    crawl.add_argument("--tor-socks", type=_host_port, metavar="HOST:PORT",
+                       help="use this running tor (e.g. 127.0.0.1:9050) instead of Tor Browser's bundled one")
+    crawl.add_argument("--load-resources", action="store_true", help="do not block images, media and fonts")
+    crawl.add_argument("--extract-in-browser", action="store_true",
+                       help="run selectors inside the browser and return only field values (no page_source)")
+    # requests backend
+    crawl.add_argument("--tor", action="store_true", help="route the requests backend through Tor")
+    crawl.add_argument("--tor-port", type=int, action="append", help="Tor SOCKS port (repeatable, default 9150)")
+    crawl.add_argument("--tor-cport", type=int, default=9151)
+    crawl.add_argument("--rotate-every", type=int, default=5, metavar="N",
+                       help="new Tor identity (and SOCKS port) every N successful fetches; 0 = only on failure")
+    crawl.set_defaults(func=cmd_crawl)
+
+    parse = sub.add_parser("parse", help="re-parse saved HTML pages into a CSV")
+    parse.add_argument("files", nargs="+")
+    parse.add_argument("--kind", choices=("search", "product"), default="product")
+    parse.add_argument("--out", default="out/parsed.csv")
+    parse.add_argument("--selector-stats", metavar="CSV", help="write per-alternative selector hit stats")
+    parse.set_defaults(func=cmd_parse)
+
+    reprice = sub.add_parser("reprice", help="recompute prices/discounts from the raw text columns of CSVs")
+    reprice.add_argument("files", nargs="+")
+    reprice.add_argument("--locale", default="auto", choices=("auto", *LOCALES),
+                         help="number format of the texts; auto (default) picks it per row from the "
+                              "marketplace in the URL (amazon.de -> de_DE), en_US if unknown")
+    reprice.add_argument("--out", default="out/repriced.csv")
+    reprice.set_defaults(func=cmd_reprice)
+
+    export = sub.add_parser("export", help="write the active selector pack as JSON")
+    export.add_argument("--out", default="-", help="output path ('-' for stdout)")
+    export.add_argument("--reorder-from", metavar="CSV",
+                        help="selector stats CSV; fallback lists are reordered by hits (most first)")
+    export.set_defaults(func=cmd_export)
+    return p
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "extract_in_browser", False) and (args.backend != "browser" or args.archive_dir):
+        parser.error("--extract-in-browser needs --backend browser and no --archive-dir (no HTML is transferred)")
+    if getattr(args, "require", None):
+        from dataclasses import fields
+        from data_models import SearchCard
+        known = {f.name for f in fields(SearchCard)} | {"product_dimensions"}
+        unknown = [name for name in args.require if name not in known]
+        if unknown:
+            parser.error(f"--require: unknown field(s) {', '.join(unknown)}; choose from {', '.join(sorted(known))}")
+    if getattr(args, "extract_in_browser", False) and args.selector_stats:
+        parser.error("--selector-stats is not available with --extract-in-browser (selectors run in the page)")
+    selectors = load_selectors(args.selectors)
+    return args.func(args, selectors)
 
 
 if __name__ == "__main__":
-    seed_search_url = "https://www.amazon.com/s?k=hats&ref=nb_sb_noss_2"
-    run(seed_search_url, page_limit=10)
+    sys.exit(main())
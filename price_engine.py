@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import itertools
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from price_patterns import AMOUNT_RE, LOCALES, LTD_HINT, PCT_RE
+
+# discount_source codes used internally; index 0 is "no discount"
+SOURCES = np.array([None, "coupon", "limited_deal", "price_compare"], dtype=object)
+_COUPON, _LIMITED_DEAL, _PRICE_COMPARE = 1, 2, 3
+
+
+def _translation(locale: str) -> Dict[int, Optional[str]]:
+    if locale not in LOCALES:
+        raise ValueError(f"Unknown locale {locale!r}; expected one of {sorted(LOCALES)}")
+    group, decimal = LOCALES[locale]
+    table: Dict[int, Optional[str]] = {ord(c): None for c in group}
+    if decimal != ".":
+        table[ord(decimal)] = "."
+    return table
+
+
+def _as_unicode(texts: Sequence[Optional[str]]) -> np.ndarray:
+    return np.array([t or "" for t in texts], dtype=str)
+
+
+def _code_matrix(arr: np.ndarray, pad: int = 0) -> np.ndarray:
+    """(n, width + pad) int32 matrix of code points, 0-filled; one row per string."""
+    n, width = len(arr), arr.dtype.itemsize // 4
+    out = np.zeros((n, width + pad), dtype=np.int32)
+    if width:
+        out[:, :width] = arr.view(np.uint32).reshape(n, width)
+    return out
+
+
+def _factorize(texts: Sequence[Optional[str]]) -> Tuple[List[Optional[str]], np.ndarray]:
+    """Distinct values + index of each row into them; coupon/badge columns repeat a handful of texts."""
+    n = len(texts)
+    first_seen: Dict[Optional[str], int] = {}
+    # map() keeps the per-row work in C: each row gets the row number where its text first appeared
+    codes = np.fromiter(map(first_seen.setdefault, texts, itertools.count()), dtype=np.intp, count=n)
+    dense = np.empty(n, dtype=np.intp)
+    dense[np.fromiter(first_seen.values(), dtype=np.intp, count=len(first_seen))] = np.arange(len(first_seen))
+    return list(first_seen), dense[codes]
+
+
+def _parse_amounts(texts: Sequence[Optional[str]], locale: str) -> np.ndarray:
+    group, decimal = LOCALES[locale]
+    arr = _as_unicode(texts)
+    n = len(arr)
+    if n == 0:
+        return np.empty(0, dtype=np.float64)
+    codes = _code_matrix(arr, pad=3)  # 0 padding: never a digit or separator, so every run ends
+    if codes.shape[1] == 3:
+        return np.full(n, np.nan)
+
+    # Grouping separators are transparent (str.translate would delete them): a digit run continues
+    # across them, and the cents digits are the next non-separator characters after the ".".
+    sep = np.zeros(codes.shape, dtype=bool)
+    for ch in group:
+        sep |= codes == ord(ch)
+    if decimal != ".":
+        codes[codes == ord(decimal)] = ord(".")
+    is_digit = (codes >= 48) & (codes <= 57)
+    has = is_digit.any(axis=1)
+    start = is_digit.argmax(axis=1)
+    col = np.arange(codes.shape[1])
+    stop = ((col >= start[:, None]) & ~is_digit & ~sep).argmax(axis=1)
+
+    # Horner over columns: vector ops per column instead of per-row Python work
+    whole = np.zeros(n, dtype=np.int64)
+    n_digits = np.zeros(n, dtype=np.int64)
+    for j in range(int(stop.max())):
+        m = is_digit[:, j] & (start <= j) & (j < stop)
+        whole = np.where(m, whole * 10 + (codes[:, j] - 48), whole)
+        n_digits += m
+
+    rows = np.arange(n)
+    p1, p2 = stop + 1, stop + 2
+    if sep.any():
+        # next_kept[i, j]: first column >= j that is not a separator
+        idx = np.where(sep, codes.shape[1] - 1, col)
+        next_kept = np.minimum.accumulate(idx[:, ::-1], axis=1)[:, ::-1]
+        p1 = next_kept[rows, stop + 1]
+        p2 = next_kept[rows, np.minimum(p1 + 1, codes.shape[1] - 1)]
+    d1, d2 = codes[rows, p1] - 48, codes[rows, p2] - 48
+    has_cents = (codes[rows, stop] == ord(".")) & (d1 >= 0) & (d1 <= 9) & (d2 >= 0) & (d2 <= 9)
+    # integer cents / 100 is one correctly rounded division, i.e. the same double as float("123.45")
+    values = np.where(has_cents, (whole * 100 + d1 * 10 + d2) / 100.0, whole.astype(np.float64))
+    values[~has] = np.nan
+
+    # Rows the fast path cannot reproduce exactly: non-ASCII Unicode digits (re's \d matches them)
+    # or runs too long for exact int64/float64 arithmetic. Those go through the regex.
+    fallback = n_digits > 13
+    non_ascii = codes > 127
+    if non_ascii.any():
+        uni_digits = [c for c in np.unique(codes[non_ascii]).tolist() if chr(c).isdecimal()]
+        if uni_digits:
+            fallback |= np.isin(codes, uni_digits).any(axis=1)
+    if fallback.any():
+        table = _translation(locale)
+        for i in np.flatnonzero(fallback):
+            m = AMOUNT_RE.search(arr[i].translate(table))
+            values[i] = float(m.group(1)) if m else np.nan
+    return values
+
+
+def parse_amounts(texts: Sequence[Optional[str]], locale: str = "en_US") -> np.ndarray:
+    """
+    Money texts -> float64 array, NaN where missing. Vectorized equivalent of
+    AMOUNT_RE.search(text.translate(locale)) (en_US: exactly AmzScraper._money_to_float):
+    drop grouping separators, map the decimal separator to ".", take the first digit run
+    plus an optional ".dd".
+    """
+    _translation(locale)  # validates the locale
+    return _parse_amounts(texts, locale)
+
+
+def parse_percents(texts: Sequence[Optional[str]]) -> np.ndarray:
+    search = PCT_RE.search
+    uniq, inverse = _factorize(texts)
+    vals = [search(t) if t else None for t in uniq]
+    return np.array([float(m.group(1)) if m else np.nan for m in vals], dtype=np.float64)[inverse]
+
+
+def _round2(x: np.ndarray) -> np.ndarray:
+    """np.round(x, 2), with values sitting on a .xx5 boundary re-rounded by Python's round() for parity."""
+    r = np.round(x, 2)
+    y = x * 100.0
+    frac = y - np.floor(y)
+    for i in np.flatnonzero(np.abs(frac - 0.5) < 1e-6):
+        r[i] = round(float(x[i]), 2)
+    return r
+
+
+def compute_discounts(
+    price_current: np.ndarray,
+    price_original: np.ndarray,
+    coupon_texts: Sequence[Optional[str]],
+    deal_texts: Sequence[Optional[str]],
+    locale: str = "en_US",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized AmzScraper._compute_discount. Returns (discount_percent float64 with NaN for none,
+    discount_source object array of "coupon" | "limited_deal" | "price_compare" | None).
+    """
+    cur = np.asarray(price_current, dtype=np.float64)
+    orig = np.asarray(price_original, dtype=np.float64)
+    n = len(cur)
+    pct = np.full(n, np.nan)
+    src = np.zeros(n, dtype=np.int8)
+
+    coupons, coupon_inv = _factorize(coupon_texts)
+    coupon_has = np.array([bool(t) for t in coupons], dtype=bool)[coupon_inv]
+    coupon_pct = parse_percents(coupons)[coupon_inv]
+    coupon_amt = parse_amounts(coupons, locale)[coupon_inv]
+    deals, deal_inv = _factorize(deal_texts)
+    deal_has = np.array([bool(t) for t in deals], dtype=bool)[deal_inv]
+    deal_pct = parse_percents(deals)[deal_inv]
+    deal_hint = np.array([bool(t and LTD_HINT.search(t)) for t in deals], dtype=bool)[deal_inv]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 1. coupon: explicit percent, else amount relative to the current price
+        m = coupon_has & ~np.isnan(coupon_pct)
+        pct[m], src[m] = coupon_pct[m], _COUPON
+        m = coupon_has & np.isnan(coupon_pct) & ~np.isnan(coupon_amt) & (cur > 0)
+        pct[m], src[m] = _round2(100.0 * coupon_amt[m] / cur[m]), _COUPON
+
+        # 2. list vs current price; a deal badge turns it into "limited_deal"
+        todo = src == 0
+        idx = np.flatnonzero(todo & ~np.isnan(cur) & (orig > 0))
+        cmp = _round2(100.0 * (orig[idx] - cur[idx]) / orig[idx])
+        keep = cmp > 0
+        idx, cmp = idx[keep], cmp[keep]
+        pct[idx] = cmp
+        src[idx] = np.where(deal_has[idx] & deal_hint[idx], _LIMITED_DEAL, _PRICE_COMPARE)
+
+        # 3. percent printed on the deal badge
+        m = (src == 0) & deal_has & ~np.isnan(deal_pct)
+        pct[m], src[m] = deal_pct[m], _LIMITED_DEAL
+
+    return pct, SOURCES[src]
+
+
+def normalize_prices(
+    current_texts: Sequence[Optional[str]],
+    original_texts: Sequence[Optional[str]],
+    coupon_texts: Sequence[Optional[str]],
+    deal_texts: Sequence[Optional[str]],
+    locale: str = "en_US",
+) -> Dict[str, np.ndarray]:
+    """Batch counterpart of the price part of AmzScraper.parse_product_page, for columns of raw texts."""
+    cur = parse_amounts(current_texts, locale)
+    orig = parse_amounts(original_texts, locale)
+    pct, src = compute_discounts(cur, orig, coupon_texts, deal_texts, locale)
+    return {
+        "price_current": cur,
+        "price_original": orig,
+        "discount_percent": pct,
+        "discount_source": src,
+    }
+
+
+def normalize_prices_by_locale(
+    current_texts: Sequence[Optional[str]],
+    original_texts: Sequence[Optional[str]],
+    coupon_texts: Sequence[Optional[str]],
+    deal_texts: Sequence[Optional[str]],
+    locales: Sequence[str],
+) -> Dict[str, np.ndarray]:
+    """normalize_prices with one locale per row (mixed-marketplace archives): one batch per locale."""
+    loc = np.array(locales, dtype=object)
+    columns = [np.array(c, dtype=object) for c in (current_texts, original_texts, coupon_texts, deal_texts)]
+    out = {
+        "price_current": np.full(len(loc), np.nan),
+        "price_original": np.full(len(loc), np.nan),
+        "discount_percent": np.full(len(loc), np.nan),
+        "discount_source": np.full(len(loc), None, dtype=object),
+    }
+    for locale in dict.fromkeys(locales):
+        idx = np.flatnonzero(loc == locale)
+        res = normalize_prices(*(c[idx].tolist() for c in columns), locale=locale)
+        for k, v in res.items():
+            out[k][idx] = v
+    return out
+
+
+def to_optional(values: np.ndarray) -> list:
+    """NaN -> None, numpy scalars -> Python values (for CSV rows / dataclasses)."""
+    if values.dtype == object:
+        return values.tolist()
+    return [None if np.isnan(v) else v for v in values.tolist()]
+
+
+def _demo_corpus(n: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    money = lambda v: f"${v:,.2f}"
+    cur = rng.uniform(1, 3000, n).round(2)
+    orig = (cur * rng.uniform(0.8, 2.0, n)).round(2)
+    coupons = np.array([None, "", "Save 15%", "Save $2.00 with coupon", "Apply 5% coupon", "Save $12.50",
+                        "Coupon", "Save 1,234.00"], dtype=object)
+    deals = np.array([None, "", "Limited time deal", "Lightning Deal 30% off", "-25%", "Deal", "Best seller",
+                      "Ends in 3h"], dtype=object)
+    current = [money(v) if rng.random() > 0.05 else None for v in cur]
+    original = [money(v) if rng.random() > 0.4 else None for v in orig]
+    return current, original, list(rng.choice(coupons, n)), list(rng.choice(deals, n))
+
+
+if __name__ == "__main__":
+    # Parity with the scalar path and speed on a synthetic archive
+    from amz_scraper import AmzScraper
+
+    n = 200_000
+    current, original, coupons, deals = _demo_corpus(n)
+
+    t0 = time.perf_counter()
+    scalar = []
+    for c, o, cp, d in zip(current, original, coupons, deals):
+        pc, po = AmzScraper._money_to_float(c), AmzScraper._money_to_float(o)
+        scalar.append((pc, po) + AmzScraper._compute_discount(pc, po, cp, d))
+    t_scalar = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    res = normalize_prices(current, original, coupons, deals)
+    t_batch = time.perf_counter() - t0
+
+    batch = list(zip(*(to_optional(res[k]) for k in
+                       ("price_current", "price_original", "discount_percent", "discount_source"))))
+    mismatches = sum(1 for a, b in zip(scalar, batch) if a != b)
+    print(f"{n} rows: scalar {t_scalar:.3f}s, batch {t_batch:.3f}s ({t_scalar / t_batch:.1f}x), "
+          f"mismatches: {mismatches}")
+
+    de = lambda s: s and s.replace(",", "_").replace(".", ",").replace("_", ".").replace("$", "") + " €"
+    res_de = normalize_prices([de(s) for s in current], [de(s) for s in original],
+                              [de(s) for s in coupons], deals, locale="de_DE")
+    same = all(np.array_equal(res[k], res_de[k], equal_nan=True) for k in ("price_current", "price_original",
+                                                                          "discount_percent"))
+    print(f"de_DE formatting gives identical prices/discounts: {same and (res['discount_source'] == res_de['discount_source']).all()}")
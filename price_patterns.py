@@ -0,0 +1,43 @@
+"""Price/discount patterns and number formats shared by the scalar parser and the NumPy batch engine."""
+from __future__ import annotations
+
+import re
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+AMOUNT_RE = re.compile(r"(\d+(?:\.\d{2})?)")
+PCT_RE = re.compile(r"(\d{1,3})\s*%")
+LTD_HINT = re.compile(r"(limited[-\s]?time|deal|lightning)", re.I)
+
+# locale -> (grouping separators, decimal separator)
+LOCALES: Dict[str, Tuple[str, str]] = {
+    "en_US": (",", "."),
+    "en_GB": (",", "."),
+    "en_CA": (",", "."),
+    "ja_JP": (",", "."),
+    "de_DE": (".", ","),
+    "it_IT": (".", ","),
+    "es_ES": (".", ","),
+    "nl_NL": (".", ","),
+    "fr_FR": (" \u00a0\u202f", ","),
+}
+
+MARKETPLACE_LOCALES: Dict[str, str] = {
+    "www.amazon.com": "en_US",
+    "www.amazon.co.uk": "en_GB",
+    "www.amazon.ca": "en_CA",
+    "www.amazon.co.jp": "ja_JP",
+    "www.amazon.de": "de_DE",
+    "www.amazon.it": "it_IT",
+    "www.amazon.es": "es_ES",
+    "www.amazon.nl": "nl_NL",
+    "www.amazon.fr": "fr_FR",
+}
+
+
+def locale_for_url(url: Optional[str], default: str = "en_US") -> str:
+    """Number format of the marketplace a product URL belongs to (amazon.de -> de_DE); default if unknown."""
+    host = (urlparse(url).hostname or "") if url else ""
+    if host and not host.startswith("www."):
+        host = "www." + host
+    return MARKETPLACE_LOCALES.get(host, default)
@@ -6,7 +6,6 @@ import random
 from typing import Tuple, Callable, Optional, Dict, Any, Iterable
 
 import requests
-from requests_tor import RequestsTor
 from headers_factory import HeaderFactory
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -21,6 +20,7 @@ class RobustFetcher:
         use_tor: bool = False,
         tor_ports: Tuple[int, ...] = (9150,),
         tor_cport: int = 9151,
+        tor_host: str = "127.0.0.1",
         per_req_sleep: Tuple[float, float] = (2.5, 5.0),
         max_retries: int = 4,
         backoff_base: float = 1.8,
@@ -28,13 +28,24 @@ class RobustFetcher:
         header_factory: Optional[Callable[[], Dict[str, str]]] = None,
         headers: Optional[Dict[str, str]] = None,
         retry_http_statuses: Iterable[int] = (403, 429, 500, 502, 503, 504),
+        rotate_every: int = 5,
     ):
         self.use_tor = use_tor
+        self.tor_host = tor_host
+        self.tor_ports = tuple(tor_ports)
+        self._tor_port_idx = 0
+        # New Tor identity every N successful fetches (RequestsTor's autochange_id cadence); 0 = only on failure
+        self.rotate_every = max(0, int(rotate_every))
+        self._fetches_since_rotate = 0
         self.rt = None
         if use_tor:
-            if not RequestsTor:
-                raise RuntimeError("requests_tor not installed but use_tor=True")
-            self.rt = RequestsTor(tor_ports=tor_ports, tor_cport=tor_cport)
+            try:
+                from requests_tor import RequestsTor  # only needed (and imported) for Tor runs
+            except ImportError as e:
+                raise RuntimeError("requests_tor not installed but use_tor=True") from e
+            # Only used for NEWNYM; traffic goes through self.sess so keep-alive survives.
+            # Its own autochange is off: fetch() rotates every rotate_every pages and resets the pool with it.
+            self.rt = RequestsTor(tor_ports=self.tor_ports, tor_cport=tor_cport, autochange_id=0)
 
         self.per_req_sleep = per_req_sleep
         self.backoff_base = backoff_base
@@ -46,16 +57,33 @@ class RobustFetcher:
         self.header_factory = header_factory or self._default_header_factory
         self.static_headers = headers
 
-        # Session (cookies persist here)
+        # Session (cookies persist here; over Tor too, via a SOCKS proxy on the pooled adapter)
         self.sess = requests.Session()
+        self._mount_pool()
+        self.sess.headers.update(self._build_headers())
+
+        # Warm up once to acquire baseline cookies
+        self._warmup()
+
+    def _tor_proxies(self) -> Dict[str, str]:
+        # socks5h: resolve DNS through Tor as well
+        port = self.tor_ports[self._tor_port_idx % len(self.tor_ports)]
+        proxy = f"socks5h://{self.tor_host}:{port}"
+        return {"http": proxy, "https": proxy}
+
+    def _mount_pool(self):
         retries = Retry(total=0, backoff_factor=0, raise_on_status=False)
         adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retries)
         self.sess.mount("http://", adapter)
         self.sess.mount("https://", adapter)
-        self.sess.headers.update(self._build_headers())
+        if self.use_tor:
+            self.sess.proxies = self._tor_proxies()
 
-        # Warm up once to acquire baseline cookies
-        self._warmup()
+    def _reset_pool(self):
+        """Drop keep-alive connections; they are pinned to the circuit they were opened on."""
+        for adapter in set(self.sess.adapters.values()):
+            adapter.close()
+        self._mount_pool()
 
     @staticmethod
     def _default_header_factory() -> Dict[str, str]:
@@ -86,10 +114,19 @@ class RobustFetcher:
         return h
 
     def _rotate_identity(self):
+        self._fetches_since_rotate = 0
         if self.rt:
             self.rt.new_id()
+            # Next SOCKS port (if several) and a fresh pool, so nothing rides the old circuit
+            self._tor_port_idx += 1
+            self._reset_pool()
             time.sleep(3)
 
+    def _count_fetch(self):
+        self._fetches_since_rotate += 1
+        if self.rotate_every and self._fetches_since_rotate >= self.rotate_every:
+            self._rotate_identity()
+
     def _polite_sleep(self):
         lo, hi = self.per_req_sleep
         time.sleep(random.uniform(lo, hi))
@@ -129,6 +166,7 @@ class RobustFetcher:
                     break
 
                 if status < 400 and not BOT_PATTERNS.search(html):
+                    self._count_fetch()
                     return html
 
                 break  # non-retryable 4xx
@@ -148,8 +186,11 @@ class RobustFetcher:
         raise RuntimeError(msg)
 
     def _get(self, url: str, headers: Dict[str, str]) -> tuple[str, int]:
-        if self.rt:
-            r = self.rt.get(url, headers=headers, timeout=self.timeout)
-        else:
-            r = self.sess.get(url, headers=headers, timeout=self.timeout)
+        r = self.sess.get(url, headers=headers, timeout=self.timeout)
         return (r.text or ""), r.status_code
+
+    def close(self):
+        try:
+            self.sess.close()
+        except Exception:
+            pass
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import copy
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Union
+
+Selector = Union[str, Sequence[str]]
+
+# Pack key listing "group.field" names whose alternatives keep their written order. Use it wherever
+# alternatives can match the same node (or one is a superset of another): reordering those changes
+# which value is returned, not just how fast it is found.
+FIXED_PRIORITY_KEY = "fixed_priority"
+
+
+def split_selector_list(selector: str) -> List[str]:
+    """Split a CSS selector list on top-level commas (not inside (), [] or quotes)."""
+    parts: List[str] = []
+    depth = 0
+    quote: Optional[str] = None
+    start = 0
+    for i, ch in enumerate(selector):
+        if quote:
+            if ch == quote and selector[i - 1] != "\\":
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(selector[start:i].strip())
+            start = i + 1
+    parts.append(selector[start:].strip())
+    return [p for p in parts if p]
+
+
+def selector_alternatives(selector: Selector) -> List[str]:
+    if isinstance(selector, str):
+        return split_selector_list(selector)
+    return [s.strip() for s in selector if s and s.strip()]
+
+
+def selector_union(selector: Selector) -> str:
+    """Single CSS selector list, for callers that need every match (select / querySelectorAll)."""
+    return selector if isinstance(selector, str) else ", ".join(selector_alternatives(selector))
+
+
+class SelectorChain:
+    """
+    Ordered fallback alternatives for one field. select_one() stops at the first alternative that
+    matches, counts tries/hits per alternative, and (adaptive=True) moves alternatives that hit more
+    often to the front. With adaptive=False the written order is kept and only stats are collected.
+    Safe to share between threads: lookups run unlocked, counters and reordering under a lock.
+    """
+
+    def __init__(self, selector: Selector, adaptive: bool = True):
+        self.alternatives: List[str] = selector_alternatives(selector)
+        self.adaptive = adaptive
+        self.tries = [0] * len(self.alternatives)
+        self.hits = [0] * len(self.alternatives)
+        self.calls = 0
+        self.order: List[int] = list(range(len(self.alternatives)))
+        self._lock = threading.Lock()
+
+    def ordered(self) -> List[str]:
+        return [self.alternatives[i] for i in self.order]
+
+    def select_one(self, root):
+        order = self.order  # rebinding (not in-place sort) keeps concurrent readers safe
+        node, tried = None, 0
+        for i in order:
+            tried += 1
+            node = root.select_one(self.alternatives[i])
+            if node is not None:
+                break
+        with self._lock:
+            self.calls += 1
+            for i in order[:tried]:
+                self.tries[i] += 1
+            if node is not None:
+                i = order[tried - 1]
+                self.hits[i] += 1
+                current = self.order
+                pos = current.index(i)
+                if self.adaptive and pos and self.hits[i] > self.hits[current[pos - 1]]:
+                    self.order = sorted(current, key=lambda j: -self.hits[j])
+        return node
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rank = {i: r for r, i in enumerate(self.order)}
+            return [
+                {
+                    "selector": alt,
+                    "rank": rank[i],
+                    "calls": self.calls,
+                    "tries": self.tries[i],
+                    "hits": self.hits[i],
+                    "hit_rate": round(self.hits[i] / self.tries[i], 4) if self.tries[i] else None,
+                }
+                for i, alt in enumerate(self.alternatives)
+            ]
+
+
+def fixed_priority_fields(pack: Dict[str, Any]) -> Set[str]:
+    return set(pack.get(FIXED_PRIORITY_KEY) or ())
+
+
+def iter_selector_fields(pack: Dict[str, Any], prefix: str = "") -> Iterable[tuple[str, Selector]]:
+    """Yield ("group.field", selector) for every str / list value of a (nested) selector pack."""
+    for k, v in pack.items():
+        name = f"{prefix}{k}"
+        if name == FIXED_PRIORITY_KEY:
+            continue
+        if isinstance(v, dict):
+            yield from iter_selector_fields(v, name + ".")
+        elif isinstance(v, (str, list, tuple)):
+            yield name, v
+
+
+def reorder_pack(pack: Dict[str, Any], stats_rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Copy of pack with every fallback list (or comma union) turned into a list sorted by exported
+    hit counts, most hits first. Single selectors, fixed-priority fields and fields without stats
+    are left as they are.
+    """
+    hits: Dict[str, Dict[str, int]] = {}
+    for r in stats_rows:
+        hits.setdefault(r["field"], {})[r["selector"]] = int(r.get("hits") or 0)
+
+    out = copy.deepcopy(pack)
+    fixed = fixed_priority_fields(pack)
+
+    def walk(d: Dict[str, Any], prefix: str):
+        for k, v in d.items():
+            name = f"{prefix}{k}"
+            if name == FIXED_PRIORITY_KEY or name in fixed:
+                continue
+            if isinstance(v, dict):
+                walk(v, name + ".")
+            elif name in hits and len(selector_alternatives(v)) > 1:
+                field_hits = hits[name]
+                d[k] = sorted(selector_alternatives(v), key=lambda s: -field_hits.get(s, 0))
+
+    walk(out, "")
+    return out
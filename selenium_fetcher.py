@@ -3,8 +3,9 @@ from __future__ import annotations
 import os
 import time
 import random
+import queue
 import shutil
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Dict, Any, List, Callable
 
 from selenium import webdriver
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
@@ -12,11 +13,126 @@ from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+from default_selectors import DEFAULT_SELECTORS
+from selector_chain import selector_alternatives
+
+try:
+    import psutil
+except ImportError:  # optional: memory stats are reported as None without it
+    psutil = None
 
 
 BASE = "https://www.amazon.com/"
 
 
+
+def ready_selector_for(selectors: Dict[str, Any]) -> str:
+    """
+    CSS list matching any of: the pack's product title, the search result grid, or the captcha form
+    (so bot pages don't hang the wait).
+    """
+    return ", ".join([
+        *selector_alternatives(selectors["product_page"]["title"]),
+        "div.s-main-slot",
+        "form[action*='validateCaptcha']",
+    ])
+
+
+DEFAULT_READY_SELECTOR = ready_selector_for(DEFAULT_SELECTORS)
+
+# Firefox prefs that keep images, media and web fonts from loading; we only need the DOM
+BLOCK_RESOURCE_PREFS: Dict[str, Any] = {
+    "permissions.default.image": 2,
+    "media.autoplay.default": 5,
+    "media.autoplay.blocking_policy": 2,
+    "media.mediasource.enabled": False,
+    "gfx.downloadable_fonts.enabled": False,
+    "browser.display.use_document_fonts": 0,
+}
+
+# Tor Browser's bundled tor listens here; pool members after the first reuse it instead of launching their own
+BUNDLED_TOR_SOCKS: Tuple[str, int] = ("127.0.0.1", 9150)
+
+
+def external_tor_setup(host: str, port: int) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """
+    (environment, Firefox prefs) that stop Tor Browser from launching its own tor and route it through an
+    already running one. Several instances of one install would otherwise all start tor on the same
+    SOCKS/control ports and data directory, and only the first would bootstrap.
+    """
+    env = {
+        "TOR_SKIP_LAUNCH": "1",
+        "TOR_SKIP_CONTROLPORT": "1",
+        "TOR_SOCKS_HOST": host,
+        "TOR_SOCKS_PORT": str(port),
+    }
+    prefs = {
+        "extensions.torlauncher.start_tor": False,
+        "extensions.torlauncher.prompt_at_startup": False,
+        "network.proxy.type": 1,
+        "network.proxy.socks": host,
+        "network.proxy.socks_port": port,
+        "network.proxy.socks_version": 5,
+        "network.proxy.socks_remote_dns": True,
+    }
+    return env, prefs
+
+
+# Evaluates an AmzScraper extraction spec in the page and returns only the field values.
+# Text mirrors bs4 get_text(" ", strip=True): stripped text nodes joined by a space, script/style skipped
+# (noscript too: with JS on, its content is one raw-markup text node rather than parsed elements).
+EXTRACT_JS = r"""
+const SKIP = {SCRIPT: 1, STYLE: 1, TEMPLATE: 1, NOSCRIPT: 1};
+function textOf(el) {
+  const parts = [];
+  const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+  let n;
+  while ((n = walker.nextNode())) {
+    if (n.parentElement && SKIP[n.parentElement.tagName]) continue;
+    const t = n.nodeValue.trim();
+    if (t) parts.push(t);
+  }
+  return parts.length ? parts.join(" ") : null;
+}
+function first(root, sels) {
+  // ordered fallback list: stop at the first alternative that matches
+  for (const sel of Array.isArray(sels) ? sels : [sels]) {
+    try {
+      const el = root.querySelector(sel);
+      if (el) return el;
+    } catch (e) {}
+  }
+  return null;
+}
+function all(root, sel) {
+  try { return Array.from(root.querySelectorAll(sel)); } catch (e) { return []; }
+}
+function evalSpec(root, spec) {
+  const out = {};
+  for (const [key, op] of Object.entries(spec)) {
+    if ("text" in op) {
+      const el = first(root, op.text);
+      out[key] = el ? textOf(el) : null;
+    } else if ("exists" in op) {
+      out[key] = !!first(root, op.exists);
+    } else if ("attr" in op) {
+      const el = first(root, op.attr);
+      out[key] = el ? el.getAttribute(op.name) : null;
+    } else if ("closest" in op) {
+      const el = root.closest ? root.closest(op.closest) : null;
+      out[key] = el ? el.getAttribute(op.name) : null;
+    } else if ("rows" in op) {
+      out[key] = all(root, op.rows).map((row) => evalSpec(row, op.fields));
+    }
+  }
+  return out;
+}
+return evalSpec(document, arguments[0]);
+"""
+
+
 def _default_tor_binary_paths() -> list[str]:
     # Common Tor Browser locations on macOS
     return [
@@ -80,8 +196,17 @@ class BrowserFetcher:
         page_load_timeout: int = 45,
         per_req_sleep: Tuple[float, float] = (1.0, 2.5),
         warmup: bool = True,
+        page_load_strategy: str = "eager",
+        block_resources: bool = True,
+        ready_selector: Optional[str] = DEFAULT_READY_SELECTOR,
+        ready_timeout: int = 20,
+        tor_socks: Optional[Tuple[str, int]] = None,
     ):
         self.per_req_sleep = per_req_sleep
+        self.ready_selector = ready_selector
+        self.ready_timeout = ready_timeout
+        self.pages = 0
+        self.busy_seconds = 0.0
 
         tor_bin = _resolve_tor_binary(tor_browser_path)
         gecko_bin = _resolve_geckodriver(geckodriver_path)
@@ -90,14 +215,26 @@ class BrowserFetcher:
         opts.binary_location = tor_bin
         if headless:
             opts.add_argument("-headless")
+        # "eager" returns from driver.get() at DOMContentLoaded instead of waiting for every subresource
+        opts.page_load_strategy = page_load_strategy
+        if block_resources:
+            for k, v in BLOCK_RESOURCE_PREFS.items():
+                opts.set_preference(k, v)
+        # tor_socks: use that running tor instead of launching the bundled one (env reaches Firefox via geckodriver)
+        service_kwargs: Dict[str, Any] = {}
+        if tor_socks:
+            env, prefs = external_tor_setup(*tor_socks)
+            for k, v in prefs.items():
+                opts.set_preference(k, v)
+            service_kwargs["env"] = {**os.environ, **env}
 
         # If geckodriver path is known, use it; otherwise let Selenium Manager resolve it
         if gecko_bin:
-            service = FirefoxService(executable_path=gecko_bin)
+            service = FirefoxService(executable_path=gecko_bin, **service_kwargs)
             self.driver = webdriver.Firefox(service=service, options=opts)
         else:
             # Selenium Manager path (requires Selenium 4.10+)
-            self.driver = webdriver.Firefox(options=opts)
+            self.driver = webdriver.Firefox(service=FirefoxService(**service_kwargs), options=opts)
 
         self.driver.set_page_load_timeout(page_load_timeout)
 
@@ -115,15 +252,145 @@ class BrowserFetcher:
         except Exception:
             pass  # best-effort
 
-    def fetch(self, url: str, rotate_on_fail: bool = True, referer: Optional[str] = None) -> str:
-        time.sleep(random.uniform(*self.per_req_sleep))
-        self.driver.get(url)
+    def _wait_ready(self, wait_for: Optional[str]):
+        sel = wait_for or self.ready_selector
+        try:
+            if sel:
+                WebDriverWait(self.driver, self.ready_timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, sel))
+                )
+                return
+        except TimeoutException:
+            pass  # unexpected page shape (404, empty result); hand back whatever rendered
         WebDriverWait(self.driver, 30).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        time.sleep(1.0)
-        return self.driver.page_source
+
+    def _load(self, url: str, read: Callable[[], Any], wait_for: Optional[str]) -> Any:
+        time.sleep(random.uniform(*self.per_req_sleep))
+        t0 = time.monotonic()
+        try:
+            self.driver.get(url)
+            self._wait_ready(wait_for)
+            return read()
+        finally:
+            self.pages += 1
+            self.busy_seconds += time.monotonic() - t0
+
+    def fetch(
+        self,
+        url: str,
+        rotate_on_fail: bool = True,
+        referer: Optional[str] = None,
+        wait_for: Optional[str] = None,
+    ) -> str:
+        return self._load(url, lambda: self.driver.page_source, wait_for)
+
+    def extract(
+        self,
+        url: str,
+        spec: Dict[str, Any],
+        rotate_on_fail: bool = True,
+        referer: Optional[str] = None,
+        wait_for: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Load url and run the spec in the page; skips the page_source transfer and the bs4 re-parse."""
+        return self._load(url, lambda: self.driver.execute_script(EXTRACT_JS, spec), wait_for)
+
+    def memory_bytes(self) -> Optional[int]:
+        """RSS of this Firefox instance (main + content processes); None without psutil."""
+        pid = self.driver.capabilities.get("moz:processID")
+        if not (psutil and pid):
+            return None
+        try:
+            proc = psutil.Process(pid)
+            procs = [proc] + proc.children(recursive=True)
+            return sum(p.memory_info().rss for p in procs)
+        except psutil.Error:
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pages": self.pages,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "pages_per_busy_sec": round(self.pages / self.busy_seconds, 3) if self.busy_seconds else None,
+            "rss_bytes": self.memory_bytes(),
+        }
 
     def close(self):
         try:
             self.driver.quit()
         except Exception:
             pass
+
+
+class BrowserPool:
+    """
+    N reusable BrowserFetcher instances behind the same .fetch() interface.
+    Safe to call from several threads; each call checks out an idle browser.
+
+    All instances share one tor: tor_socks=(host, port) of a running tor, or else the first instance
+    launches Tor Browser's bundled tor and the rest connect to it on BUNDLED_TOR_SOCKS.
+    """
+
+    def __init__(self, size: int = 2, tor_socks: Optional[Tuple[str, int]] = None, **fetcher_kwargs):
+        self.fetchers: List[BrowserFetcher] = []
+        try:
+            for i in range(max(1, int(size))):
+                socks = tor_socks or (BUNDLED_TOR_SOCKS if i else None)
+                self.fetchers.append(BrowserFetcher(tor_socks=socks, **fetcher_kwargs))
+        except Exception:
+            self.close()
+            raise
+        self._idle: queue.Queue[BrowserFetcher] = queue.Queue()
+        for f in self.fetchers:
+            self._idle.put(f)
+        self.started = time.monotonic()
+
+    @property
+    def size(self) -> int:
+        return len(self.fetchers)
+
+    def fetch(
+        self,
+        url: str,
+        rotate_on_fail: bool = True,
+        referer: Optional[str] = None,
+        wait_for: Optional[str] = None,
+    ) -> str:
+        f = self._idle.get()
+        try:
+            return f.fetch(url, rotate_on_fail=rotate_on_fail, referer=referer, wait_for=wait_for)
+        finally:
+            self._idle.put(f)
+
+    def extract(
+        self,
+        url: str,
+        spec: Dict[str, Any],
+        rotate_on_fail: bool = True,
+        referer: Optional[str] = None,
+        wait_for: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        f = self._idle.get()
+        try:
+            return f.extract(url, spec, rotate_on_fail=rotate_on_fail, referer=referer, wait_for=wait_for)
+        finally:
+            self._idle.put(f)
+
+    def stats(self) -> Dict[str, Any]:
+        per_instance = [f.stats() for f in self.fetchers]
+        pages = sum(s["pages"] for s in per_instance)
+        elapsed = time.monotonic() - self.started
+        rss = [s["rss_bytes"] for s in per_instance if s["rss_bytes"] is not None]
+        return {
+            "instances": self.size,
+            "pages": pages,
+            "elapsed_seconds": round(elapsed, 3),
+            "pages_per_wall_sec": round(pages / elapsed, 3) if elapsed else None,
+            "rss_bytes_per_instance": int(sum(rss) / len(rss)) if rss else None,
+            "per_instance": per_instance,
+        }
+
+    def close(self):
+        # Reverse order: the instance that owns the bundled tor goes last
+        for f in reversed(self.fetchers):
+            f.close()
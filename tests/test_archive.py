@@ -0,0 +1,31 @@
+import csv
+
+from main import ArchivingFetcher, main
+
+PRODUCT_HTML = """<html><body>
+<span id="productTitle">Wool Beanie</span>
+<div id="corePrice_feature_div"><span class="a-price"><span class="a-offscreen">$12.50</span></span></div>
+</body></html>"""
+
+
+class _StubFetcher:
+    def fetch(self, url, rotate_on_fail=True, referer=None):
+        return PRODUCT_HTML
+
+    def close(self):
+        pass
+
+
+def test_parse_restores_url_and_asin_of_archived_product(tmp_path):
+    url = "https://www.amazon.com/Wool-Beanie/dp/B0FHPYBYYZ/ref=sr_1_2"
+    fetcher = ArchivingFetcher(_StubFetcher(), str(tmp_path / "archive"))
+    fetcher.kind = "product"
+    fetcher.fetch(url)
+    pages = sorted((tmp_path / "archive" / "product").glob("*.html"))
+    out = tmp_path / "reparsed.csv"
+
+    assert main(["parse", *map(str, pages), "--out", str(out)]) == 0
+
+    with open(out, encoding="utf-8-sig", newline="") as f:
+        (row,) = list(csv.DictReader(f))
+    assert (row["url"], row["asin"], row["title"], row["price_current"]) == (url, "B0FHPYBYYZ", "Wool Beanie", "12.5")
@@ -0,0 +1,46 @@
+import selenium_fetcher
+from selenium_fetcher import BUNDLED_TOR_SOCKS, BrowserPool
+
+
+class _Driver:
+    launched = []
+
+    def __init__(self, service=None, options=None):
+        type(self).launched.append((service, options))
+        self.capabilities = {}
+
+    def set_page_load_timeout(self, t):
+        pass
+
+    def quit(self):
+        pass
+
+
+def _pool(monkeypatch, tmp_path, **kwargs):
+    binary = tmp_path / "firefox"
+    binary.write_text("")
+    _Driver.launched = []
+    monkeypatch.setattr(selenium_fetcher.webdriver, "Firefox", _Driver)
+    return BrowserPool(size=3, tor_browser_path=str(binary), geckodriver_path=str(binary), warmup=False, **kwargs)
+
+
+def _tor_setup(launch):
+    service, options = launch
+    prefs = options.preferences
+    return (service.env or {}).get("TOR_SKIP_LAUNCH"), prefs.get("network.proxy.socks"), prefs.get("network.proxy.socks_port")
+
+
+def test_pool_members_share_the_first_browsers_tor(monkeypatch, tmp_path):
+    pool = _pool(monkeypatch, tmp_path)
+    host, port = BUNDLED_TOR_SOCKS
+
+    setups = [_tor_setup(launch) for launch in _Driver.launched]
+    assert setups == [(None, None, None), ("1", host, port), ("1", host, port)]
+    pool.close()
+
+
+def test_pool_uses_given_tor_for_every_member(monkeypatch, tmp_path):
+    pool = _pool(monkeypatch, tmp_path, tor_socks=("127.0.0.1", 9050))
+
+    assert [_tor_setup(launch) for launch in _Driver.launched] == [("1", "127.0.0.1", 9050)] * 3
+    pool.close()
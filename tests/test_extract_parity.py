@@ -0,0 +1,88 @@
+"""
+The in-browser path (EXTRACT_JS + *_from_fields) must give the same results as parsing page_source.
+EXTRACT_JS needs a browser, so the spec is evaluated here with soupsieve, op by op as the script does.
+"""
+import re
+from dataclasses import asdict
+from pathlib import Path
+
+import soupsieve as sv
+from bs4 import Comment
+
+from amz_scraper import AmzScraper
+from selenium_fetcher import EXTRACT_JS
+
+FIXTURES = Path(__file__).parent / "fixtures"
+SKIP = {t.lower() for t in re.findall(r"(\w+): 1", re.search(r"const SKIP = \{(.*?)\}", EXTRACT_JS).group(1))}
+
+
+def _text_of(el):
+    # createTreeWalker(SHOW_TEXT): text nodes only (no comments), parent tag not in SKIP
+    parts = [s.strip() for s in el.find_all(string=True) if not isinstance(s, Comment) and s.parent.name not in SKIP]
+    parts = [p for p in parts if p]
+    return " ".join(parts) if parts else None
+
+
+def _first(root, sels):
+    for sel in sels if isinstance(sels, list) else [sels]:
+        try:
+            el = root.select_one(sel)
+        except sv.SelectorSyntaxError:
+            continue
+        if el is not None:
+            return el
+    return None
+
+
+def _closest(root, sel):
+    for el in [root, *root.parents]:
+        if getattr(el, "name", None) and el.name != "[document]" and sv.match(sel, el):
+            return el
+    return None
+
+
+def eval_spec(root, spec):
+    out = {}
+    for key, op in spec.items():
+        if "text" in op:
+            el = _first(root, op["text"])
+            out[key] = _text_of(el) if el is not None else None
+        elif "exists" in op:
+            out[key] = _first(root, op["exists"]) is not None
+        elif "attr" in op:
+            el = _first(root, op["attr"])
+            out[key] = el.get(op["name"]) if el is not None else None
+        elif "closest" in op:
+            el = _closest(root, op["closest"])
+            out[key] = el.get(op["name"]) if el is not None else None
+        elif "rows" in op:
+            out[key] = [eval_spec(row, op["fields"]) for row in root.select(op["rows"])]
+    return out
+
+
+def test_js_handles_every_spec_op():
+    for op in ("text", "exists", "attr", "closest", "rows"):
+        assert f'"{op}" in op' in EXTRACT_JS
+
+
+def test_product_from_fields_matches_parse_product_page():
+    html = (FIXTURES / "product.html").read_text(encoding="utf-8")
+    scraper = AmzScraper(fetcher=None)
+
+    parsed = scraper.parse_product_page(html)
+    extracted = scraper.product_from_fields(eval_spec(scraper.soup(html), scraper.product_extraction_spec()))
+
+    assert asdict(extracted) == asdict(parsed)
+    assert parsed.price_current == 1012.5 and parsed.details_kv  # the fixture exercises the price/table paths
+
+
+def test_search_from_fields_matches_parse_search_results():
+    html = (FIXTURES / "search.html").read_text(encoding="utf-8")
+    scraper = AmzScraper(fetcher=None)
+
+    parsed = scraper.parse_search_results(html)
+    cards, next_url = scraper.search_from_fields(eval_spec(scraper.soup(html), scraper.search_extraction_spec()))
+
+    assert [asdict(c) for c in cards] == [asdict(c) for c in parsed]
+    assert next_url == scraper.next_page_url(html) is not None
+    assert len(parsed) == 3
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+import price_engine
+from amz_scraper import AmzScraper
+
+EDGE_AMOUNTS = [
+    None, "", "$", "N/A", "$.99", "12.345", "$12.3", "$12.30", "$1,299.99", "1,2,3.45", "$0.5", "Price: 3.50 (x2)",
+    "$١٢.٥٠",   # Arabic-Indic digits: re's \d matches them
+    "１２３.45",        # fullwidth digits
+    "$12345678901234.56",           # more than 13 digits: past exact int64 cents
+    "$99999999999999999999",
+    "$12 345.67",
+]
+EDGE_COUPONS = [None, "", "Save 15%", "Save 1 %", "Save $2.00 with coupon", "Save $.50", "Coupon", "Save 1,234.00"]
+EDGE_DEALS = [None, "", "Limited time deal", "Lightning Deal 30% off", "-25%", "Deal", "Ends in 3h"]
+
+
+def _scalar(current, original, coupons, deals):
+    out = []
+    for c, o, cp, d in zip(current, original, coupons, deals):
+        pc, po = AmzScraper._money_to_float(c), AmzScraper._money_to_float(o)
+        out.append((pc, po) + AmzScraper._compute_discount(pc, po, cp, d))
+    return out
+
+
+def _batch(res):
+    keys = ("price_current", "price_original", "discount_percent", "discount_source")
+    return list(zip(*(price_engine.to_optional(res[k]) for k in keys)))
+
+
+def test_parse_amounts_matches_scalar_on_edge_cases():
+    expected = [AmzScraper._money_to_float(t) for t in EDGE_AMOUNTS]
+
+    assert price_engine.to_optional(price_engine.parse_amounts(EDGE_AMOUNTS)) == expected
+
+
+def test_normalize_prices_matches_scalar_on_edge_cases():
+    rng = np.random.default_rng(3)
+    n = 2000
+    pick = lambda values: [values[i] for i in rng.integers(0, len(values), n)]
+    cols = pick(EDGE_AMOUNTS), pick(EDGE_AMOUNTS), pick(EDGE_COUPONS), pick(EDGE_DEALS)
+
+    assert _batch(price_engine.normalize_prices(*cols)) == _scalar(*cols)
+
+
+def test_normalize_prices_matches_scalar_on_demo_corpus():
+    cols = price_engine._demo_corpus(20_000)
+
+    assert _batch(price_engine.normalize_prices(*cols)) == _scalar(*cols)
+
+
+def _de(s):
+    return s and s.replace(",", "_").replace(".", ",").replace("_", ".").replace("$", "") + " €"
+
+
+def _fr(s):
+    return s and s.replace(",", " ").replace(".", ",").replace("$", "") + " €"
+
+
+@pytest.mark.parametrize("locale, fmt", [("de_DE", _de), ("fr_FR", _fr)])
+def test_locale_formatting_gives_same_result_as_en_us(locale, fmt):
+    current, original, coupons, deals = price_engine._demo_corpus(5_000)
+    expected = _batch(price_engine.normalize_prices(current, original, coupons, deals))
+
+    res = price_engine.normalize_prices([fmt(s) for s in current], [fmt(s) for s in original],
+                                        [fmt(s) for s in coupons], deals, locale=locale)
+
+    assert _batch(res) == expected
+
+
+def test_by_locale_matches_single_locale_batches():
+    en = ["$1,299.00", "$5.00", None]
+    de = ["1.299,00 €", "5,00 €", None]
+    res = price_engine.normalize_prices_by_locale(
+        [en[0], de[0], en[1], de[1], None], [None] * 5, [None] * 5, [None] * 5,
+        ["en_US", "de_DE", "en_US", "de_DE", "en_US"],
+    )
+
+    assert price_engine.to_optional(res["price_current"]) == [1299.0, 1299.0, 5.0, 5.0, None]
+
+
+def test_empty_input():
+    res = price_engine.normalize_prices([], [], [], [])
+
+    assert all(len(v) == 0 for v in res.values())
+    assert len(price_engine.parse_amounts([])) == 0
+
+
+def test_locale_for_url():
+    from price_patterns import locale_for_url
+
+    assert locale_for_url("https://www.amazon.de/dp/B000000001") == "de_DE"
+    assert locale_for_url("https://amazon.co.uk/dp/B000000001") == "en_GB"
+    assert locale_for_url("/dp/B000000001") == "en_US"
+    assert locale_for_url(None, default="fr_FR") == "fr_FR"
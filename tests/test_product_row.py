@@ -0,0 +1,43 @@
+import price_engine
+from data_models import ProductDetails, SearchCard
+from main import REPRICE_TEXT_COLUMNS, _product_row
+
+
+def _details(**kwargs):
+    return ProductDetails(
+        name="Beanie", seller_name=None, description_text=None, is_in_stock=True, return_policy_text=None,
+        images_text=None, details_kv={}, has_related_deals=False, **kwargs,
+    )
+
+
+def _card(**kwargs):
+    return SearchCard(title="Beanie", price_text=None, has_coupon=False, is_limited_time_deal=False,
+                      product_url="https://www.amazon.com/dp/B0FHPYBYYZ", **kwargs)
+
+
+def _repriced(row):
+    res = price_engine.normalize_prices(*([row[c]] for c in REPRICE_TEXT_COLUMNS))
+    return {k: price_engine.to_optional(v)[0] for k, v in res.items()}
+
+
+def test_enriched_row_discount_matches_its_texts():
+    # Coupon only on the card, prices only on the product page
+    card = _card(coupon_text="Save 10% with coupon", discount_percent=10.0, discount_source="coupon")
+    details = _details(price_current=20.0, price_original=25.0, discount_percent=20.0, discount_source="price_compare",
+                       price_current_text="$20.00", price_original_text="$25.00")
+
+    row = _product_row(card, details)
+
+    assert (row["coupon_text"], row["discount_percent"], row["discount_source"]) == ("Save 10% with coupon", 10.0, "coupon")
+    assert _repriced(row) == {k: row[k] for k in ("price_current", "price_original", "discount_percent", "discount_source")}
+
+
+def test_card_prices_kept_when_product_page_has_none():
+    card = _card(price_current=8.0, price_original=10.0, discount_percent=20.0, discount_source="price_compare",
+                 price_current_text="$8.00", price_original_text="$10.00")
+    details = _details(limited_deal_text="Limited time deal")
+
+    row = _product_row(card, details)
+
+    assert (row["price_current"], row["discount_percent"], row["discount_source"]) == (8.0, 20.0, "limited_deal")
+    assert _repriced(row) == {k: row[k] for k in ("price_current", "price_original", "discount_percent", "discount_source")}
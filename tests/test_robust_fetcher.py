@@ -0,0 +1,145 @@
+import socket
+import socketserver
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import robust_fetcher
+from robust_fetcher import RobustFetcher
+
+
+class _Page(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    cookies_seen: list = []
+
+    def do_GET(self):
+        type(self).cookies_seen.append(self.headers.get("Cookie"))
+        body = b"<html>ok</html>"
+        self.send_response(200)
+        self.send_header("Set-Cookie", "session-id=abc; Path=/")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Socks5(socketserver.ThreadingTCPServer):
+    """Minimal no-auth SOCKS5 CONNECT proxy that counts the tunnels it opens (one per pooled connection)."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SocksHandler)
+        self.tunnels = 0
+
+
+class _SocksHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        c = self.request
+        c.recv(262)
+        c.sendall(b"\x05\x00")
+        _, _, _, atyp = c.recv(4)
+        host = socket.inet_ntoa(c.recv(4)) if atyp == 1 else c.recv(c.recv(1)[0]).decode()
+        (port,) = struct.unpack(">H", c.recv(2))
+        upstream = socket.create_connection((host, port))
+        self.server.tunnels += 1
+        c.sendall(b"\x05\x00\x00\x01" + socket.inet_aton("127.0.0.1") + struct.pack(">H", 0))
+        t = threading.Thread(target=_pipe, args=(c, upstream), daemon=True)
+        t.start()
+        _pipe(upstream, c)
+        t.join()
+
+
+def _pipe(src, dst):
+    try:
+        while True:
+            data = src.recv(65536)
+            if not data:
+                break
+            dst.sendall(data)
+    except OSError:
+        pass
+    finally:
+        try:
+            dst.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+
+def _serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _FakeController:
+    def __init__(self):
+        self.new_ids = 0
+
+    def new_id(self):
+        self.new_ids += 1
+
+
+@pytest.fixture
+def tor_setup(monkeypatch):
+    _Page.cookies_seen = []
+    page = _serve(ThreadingHTTPServer(("127.0.0.1", 0), _Page))
+    socks = [_serve(_Socks5()), _serve(_Socks5())]
+    monkeypatch.setattr(RobustFetcher, "_warmup", lambda self: None)
+    monkeypatch.setattr(robust_fetcher.time, "sleep", lambda s: None)
+
+    def make(**kwargs):
+        f = RobustFetcher(
+            use_tor=True,
+            tor_ports=tuple(s.server_address[1] for s in socks),
+            per_req_sleep=(0, 0),
+            header_factory=lambda: {"User-Agent": "test"},
+            **kwargs,
+        )
+        f.rt = _FakeController()  # no control port here; count NEWNYMs instead
+        return f
+
+    yield make, f"http://127.0.0.1:{page.server_address[1]}/dp/B000000001", socks
+    page.shutdown()
+    for s in socks:
+        s.shutdown()
+
+
+def test_connection_and_cookies_reused_over_socks(tor_setup):
+    make, url, socks = tor_setup
+    f = make(rotate_every=0)
+    for _ in range(4):
+        assert f.fetch(url) == "<html>ok</html>"
+    f.close()
+
+    assert socks[0].tunnels == 1
+    assert socks[1].tunnels == 0
+    assert _Page.cookies_seen[0] is None
+    assert all(c == "session-id=abc" for c in _Page.cookies_seen[1:])
+
+
+def test_rotate_identity_resets_pool_and_moves_to_next_port(tor_setup):
+    make, url, socks = tor_setup
+    f = make(rotate_every=0)
+    f.fetch(url)
+    f._rotate_identity()
+    f.fetch(url)
+    f.close()
+
+    assert f.rt.new_ids == 1
+    assert (socks[0].tunnels, socks[1].tunnels) == (1, 1)
+    assert _Page.cookies_seen[-1] == "session-id=abc"  # cookies survive the pool reset
+
+
+def test_rotates_every_n_successful_fetches(tor_setup):
+    make, url, _ = tor_setup
+    f = make(rotate_every=2)
+    for _ in range(5):
+        f.fetch(url)
+    f.close()
+
+    assert f.rt.new_ids == 2
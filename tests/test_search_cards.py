@@ -0,0 +1,38 @@
+from amz_scraper import AmzScraper
+
+
+def _card(asin: str, title: str, strike: bool) -> str:
+    html = (
+        f'<div data-asin="{asin}"><div class="a-section a-spacing-base desktop-grid-content-view">'
+        f'<a class="a-link-normal s-no-outline" href="/x/dp/{asin}"></a>'
+        f'<h2 class="a-size-base-plus a-spacing-none a-color-base a-text-normal">{title}</h2>'
+        '<span class="a-price" data-a-color="base"><span class="a-offscreen">$19.99</span></span>'
+    )
+    if strike:
+        html += ('<span class="a-price a-text-price" data-a-strike="true" data-a-color="secondary">'
+                 '<span class="a-offscreen">$35.02</span></span>')
+    # Unit price: also an .a-price.a-text-price, but never the original price
+    html += ('(<span class="a-price a-text-price" data-a-size="b" data-a-color="secondary">'
+             '<span class="a-offscreen">$0.50</span></span>/count)')
+    return html + "</div></div>"
+
+
+def test_unit_price_is_not_original_price_after_unit_only_cards():
+    # Unit-price-only cards first, so an adaptive chain would have promoted a broad alternative
+    cards_html = [_card(f"B00000000{i}", f"unit {i}", strike=False) for i in range(5)]
+    cards_html.append(_card("B000000009", "strike", strike=True))
+    scraper = AmzScraper(fetcher=None)
+
+    cards = scraper.parse_search_results("<html><body>" + "".join(cards_html) + "</body></html>")
+
+    assert [c.price_original for c in cards[:5]] == [None] * 5
+    assert (cards[5].price_current, cards[5].price_original) == (19.99, 35.02)
+
+
+def test_limited_time_deal_chain_runs_once_per_card():
+    scraper = AmzScraper(fetcher=None)
+    scraper.parse_search_results("<html><body>" + _card("B000000001", "a", False) + _card("B000000002", "b", True)
+                                 + "</body></html>")
+
+    rows = [r for r in scraper.selector_stats() if r["field"] == "page_result_products.is_limited_time_deal"]
+    assert rows and all(r["calls"] == 2 for r in rows)
@@ -0,0 +1,111 @@
+import sys
+import threading
+
+from bs4 import BeautifulSoup
+
+from amz_scraper import AmzScraper
+from selector_chain import FIXED_PRIORITY_KEY, SelectorChain, reorder_pack, split_selector_list
+
+ONLY_B = BeautifulSoup('<div><span class="b">B</span></div>', "lxml")
+BOTH = BeautifulSoup('<div><span class="a">A</span><span class="b">B</span></div>', "lxml")
+
+
+def _by_selector(chain):
+    return {r["selector"]: r for r in chain.stats()}
+
+
+def test_stops_at_first_matching_alternative():
+    chain = SelectorChain(["span.a", "span.b", "span.c"])
+
+    assert chain.select_one(BOTH).text == "A"
+
+    stats = _by_selector(chain)
+    assert [stats[s]["tries"] for s in ("span.a", "span.b", "span.c")] == [1, 0, 0]
+    assert stats["span.a"]["hits"] == 1
+
+
+def test_alternative_that_overtakes_is_promoted():
+    chain = SelectorChain(["span.a", "span.b"])
+
+    chain.select_one(ONLY_B)
+    assert chain.ordered() == ["span.b", "span.a"]  # 1 hit vs 0
+    assert chain.select_one(BOTH).text == "B"  # reordering changes the value on overlapping pages
+    assert _by_selector(chain)["span.b"]["rank"] == 0
+
+
+def test_fixed_priority_chain_keeps_written_order():
+    chain = SelectorChain(["span.a", "span.b"], adaptive=False)
+    for _ in range(5):
+        chain.select_one(ONLY_B)
+
+    assert chain.ordered() == ["span.a", "span.b"]
+    assert chain.select_one(BOTH).text == "A"
+    assert _by_selector(chain)["span.b"]["hits"] == 5
+
+
+def test_scraper_builds_fixed_chains_from_pack():
+    pack = {
+        FIXED_PRIORITY_KEY: ["g.fixed"],
+        "g": {"fixed": ["span.a", "span.b"], "adaptive": ["span.c", "span.b"]},
+    }
+    scraper = AmzScraper(fetcher=None, selectors=pack)
+
+    assert not scraper._chain(pack["g"]["fixed"]).adaptive
+    assert scraper._chain(pack["g"]["adaptive"]).adaptive
+    assert {r["field"] for r in scraper.selector_stats()} == {"g.fixed", "g.adaptive"}
+
+
+def test_split_selector_list_respects_parens_and_quotes():
+    sel = "div:is(.a, .b) > span, a[title='x, y'], a[title=\"p,q\"] ,  #id"
+
+    assert split_selector_list(sel) == [
+        "div:is(.a, .b) > span",
+        "a[title='x, y']",
+        'a[title="p,q"]',
+        "#id",
+    ]
+
+
+def test_reorder_pack_skips_fixed_fields():
+    pack = {
+        FIXED_PRIORITY_KEY: ["g.fixed"],
+        "g": {"fixed": ["span.a", "span.b"], "adaptive": "span.a, span.b", "single": "span.a"},
+    }
+    rows = [
+        {"field": f"g.{name}", "selector": sel, "hits": hits}
+        for name in ("fixed", "adaptive", "single")
+        for sel, hits in (("span.a", "1"), ("span.b", "7"))
+    ]
+
+    out = reorder_pack(pack, rows)
+
+    assert out["g"] == {"fixed": ["span.a", "span.b"], "adaptive": ["span.b", "span.a"], "single": "span.a"}
+    assert out[FIXED_PRIORITY_KEY] == ["g.fixed"]
+    assert pack["g"]["adaptive"] == "span.a, span.b"  # input untouched
+
+
+def test_shared_chain_counts_every_call_across_threads():
+    scraper = AmzScraper(fetcher=None, selectors={"g": {"f": ["span.a", "span.b"]}})
+    sel = scraper.sel["g"]["f"]
+    start = threading.Barrier(8)
+
+    def work():
+        start.wait()
+        for i in range(200):
+            scraper.query_text(ONLY_B if i % 2 else BOTH, sel)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads as often as possible to expose lost updates
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    stats = scraper.selector_stats()
+    assert len(scraper._chains) == 1
+    assert stats[0]["calls"] == 1600
+    assert sum(r["hits"] for r in stats) == 1600